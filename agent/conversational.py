@@ -1,136 +1,215 @@
-from langchain.agents import initialize_agent, AgentType
-from langchain_core.messages import SystemMessage
-from langchain.memory import ConversationBufferMemory
+from langchain.agents import initialize_agent, AgentType, AgentExecutor, create_tool_calling_agent
+from langchain_core.messages import get_buffer_string
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from core.llm import load_llm
 from core.tools import load_tools
-from core.memory import get_memory
+from core.prompt_budget import PromptBudget, count_tokens
+from core.scheduler import SchedulerRejected
+from agent.prompts import get_agent_system_prompt
+from config.settings import settings
+import asyncio
 import datetime
+import time
 
-def get_conversational_agent():
+PARTIAL_ANSWER_PROMPT = (
+    "You are 'Agri-Advisor', an assistant for Indian agriculture. You ran out of time while researching "
+    "the user's question. Using ONLY the findings below, write the most useful answer you can in simple "
+    "language. If the findings are incomplete, say which part could not be checked.\n\n"
+    "Question: {question}\n\n"
+    "Findings:\n{findings}\n\n"
+    "Answer:"
+)
+
+REACT_TOOLS_HEADER = "\n\nTOOLS:\n------\n\nAgri-Advisor has access to the following tools:"
+
+TIMEOUT_MESSAGE = "I could not find enough information from public sources in time to answer this question."
+
+
+class DeadlineAgent:
+    """
+    Wraps an AgentExecutor so each turn runs within a latency budget.
+
+    The executor's steps are streamed and collected as they complete. When the
+    budget (minus a reserve for the final answer) runs out, the loop is cut off
+    and a best-effort answer is written from the tool observations gathered so far.
+    The same happens if a model or search call is rejected by the scheduler
+    mid-turn after some tool steps have completed.
+    Callers with their own request deadline pass what is left of it as `budget`.
+
+    Results carry a `prompt_tokens` report (system prompt, trimmed history and
+    the tool observations as last written to the scratchpad, with item counts)
+    when a prompt budget is set, and None otherwise.
+    """
+
+    def __init__(self, executor, llm, budget=None, reserve=None, prompt_budget=None, history_as_text=False):
+        self.executor = executor
+        self.llm = llm
+        self.prompt_budget = prompt_budget
+        self.history_as_text = history_as_text
+        self.budget = budget if budget is not None else settings.AGENT_TIME_BUDGET
+        self.reserve = reserve if reserve is not None else settings.AGENT_ANSWER_RESERVE
+
+    def _prepare(self, inputs):
+        """
+        Stamps today's date on the request and trims the chat history to the
+        prompt budget. The ReAct prompt takes the history as a text transcript.
+        Returns the executor inputs and the trimmed history messages.
+        """
+        inputs = dict(inputs, current_date=datetime.datetime.now().strftime("%A, %B %d, %Y"))
+        history = inputs.get("chat_history") or []
+        if self.prompt_budget is not None and history:
+            history = self.prompt_budget.fit_history(history, reserved=count_tokens(inputs["input"]))
+        inputs["chat_history"] = get_buffer_string(history) if self.history_as_text else history
+        return inputs, history
+
+    def _prompt_tokens(self, inputs, history, steps):
+        """Measures the last agent prompt: the observations are trimmed exactly as the executor trims them."""
+        if self.prompt_budget is None:
+            return None
+        fitted = self.prompt_budget.fit_observations([(step.action, step.observation) for step in steps])
+        return self.prompt_budget.report(
+            history=history,
+            input=inputs["input"],
+            observations=[observation for _, observation in fitted],
+        )
+
+    def _result(self, output, inputs, history, steps, partial):
+        return {
+            "output": output,
+            "intermediate_steps": steps,
+            "partial": partial,
+            "prompt_tokens": self._prompt_tokens(inputs, history, steps),
+        }
+
+    async def ainvoke(self, inputs, budget=None):
+        deadline = time.monotonic() + (budget if budget is not None else self.budget)
+        inputs, history = self._prepare(inputs)
+        steps = []
+        result = {}
+
+        async def consume():
+            async for chunk in self.executor.astream(inputs):
+                steps.extend(chunk.get("steps", []))
+                if "output" in chunk:
+                    result["output"] = chunk["output"]
+
+        try:
+            await asyncio.wait_for(consume(), timeout=max(deadline - time.monotonic() - self.reserve, 0))
+            return self._result(result.get("output", ""), inputs, history, steps, partial=False)
+        except asyncio.TimeoutError:
+            print(f"--- Agent deadline reached after {len(steps)} tool steps; writing partial answer ---")
+        except SchedulerRejected as e:
+            if not steps:
+                raise
+            print(f"--- Agent call rejected after {len(steps)} tool steps ({e}); writing partial answer ---")
+
+        output = await self._apartial_answer(inputs["input"], steps, deadline)
+        return self._result(output, inputs, history, steps, partial=True)
+
+    def invoke(self, inputs, budget=None):
+        """Synchronous variant; the deadline is checked between agent steps."""
+        deadline = time.monotonic() + (budget if budget is not None else self.budget)
+        inputs, history = self._prepare(inputs)
+        steps = []
+        for chunk in self.executor.stream(inputs):
+            steps.extend(chunk.get("steps", []))
+            if "output" in chunk:
+                return self._result(chunk["output"], inputs, history, steps, partial=False)
+            if time.monotonic() >= deadline - self.reserve:
+                print(f"--- Agent deadline reached after {len(steps)} tool steps; writing partial answer ---")
+                break
+
+        findings = _format_findings(steps)
+        if not findings:
+            return self._result(TIMEOUT_MESSAGE, inputs, history, steps, partial=True)
+        try:
+            message = self.llm.invoke(PARTIAL_ANSWER_PROMPT.format(question=inputs["input"], findings=findings))
+            output = message.content
+        except Exception as e:
+            print(f"Partial answer generation failed: {e}")
+            output = findings
+        return self._result(output, inputs, history, steps, partial=True)
+
+    async def _apartial_answer(self, question, steps, deadline):
+        findings = _format_findings(steps)
+        if not findings:
+            return TIMEOUT_MESSAGE
+        try:
+            message = await asyncio.wait_for(
+                self.llm.ainvoke(PARTIAL_ANSWER_PROMPT.format(question=question, findings=findings)),
+                timeout=max(deadline - time.monotonic(), 1.0),
+            )
+            return message.content
+        except Exception as e:
+            print(f"Partial answer generation failed: {e}")
+            return findings
+
+
+def _format_findings(steps, max_chars=1500):
+    """Renders completed tool steps as plain text for the partial-answer prompt."""
+    findings = []
+    for step in steps:
+        observation = str(step.observation)[:max_chars]
+        findings.append(f"- {step.action.tool}({step.action.tool_input}): {observation}")
+    return "\n".join(findings)
+
+
+def get_conversational_agent(mode=None):
     """
     Initializes a conversational agent aligned with the Capital One Launchpad challenge,
     using a direct and robust method to ensure instructions are followed.
+
+    `mode` is "react" or "tool_calling" (defaults to settings.AGENT_MODE). The
+    returned DeadlineAgent keeps every turn within settings.AGENT_TIME_BUDGET.
+    The system prompt comes from settings.PROMPT_PROFILE and is dated per request.
+    Neither mode keeps memory: callers pass the chat history with each request,
+    and it is trimmed to the prompt budget along with the tool observations.
     """
+    mode = mode or settings.AGENT_MODE
     llm = load_llm()
     tools = load_tools()
-    
-    chat_history = get_memory()
 
-    memory = ConversationBufferMemory(
-        memory_key="chat_history",
-        chat_memory=chat_history,
-        return_messages=True
-    )
-
-    # Get the current date to provide context to the agent.
-    current_date = datetime.datetime.now().strftime("%A, %B %d, %Y")
-
-    # --- HACKATHON-SPECIFIC PROMPT (EXTENDED) ---
-    system_prompt = f"""
-        You are 'Agri-Advisor', an advanced, human-aligned AI agent. Your purpose is to serve as a specialized expert for the Capital One Launchpad innovation challenge. Your entire existence is dedicated to assisting the Indian agricultural sector.
-
-        ---
-        ### **Current Context**
-        - **Today's Date:** {current_date}. You must use this date when answering questions about time-sensitive topics like planting seasons or market prices.
-
-        ---
-        ### **Core Directive**
-        Your primary function is to act as an AI-powered advisor for agri-related queries in India. When the user's documents do not contain an answer, you will use your tools to find information from public sources. You have no memory or knowledge beyond what is in the provided chat history and what your tools can find. Your responses must be grounded in verifiable facts from your tools.
-
-        ---
-        ### **Persona and Audience**
-        - **Your Persona:** You are a knowledgeable, patient, and trustworthy advisor. Your tone should be professional, empathetic, and clear. You are not a casual chatbot; you are a professional tool designed for critical decision-making. Project confidence and expertise in your responses.
-        - **Your Audience:** You are speaking to farmers, financiers, vendors, and other stakeholders in the Indian agricultural industry. Many users may have low digital literacy. Your language must be simple, direct, and easy to understand. Avoid complex jargon at all costs. Use analogies related to farming and nature where appropriate.
-        - **Language Nuances:** Be prepared for Hinglish (Hindi + English) and other regional language phrases mixed with English. While you will process the translated query, your final response should be in simple, accessible English that is easy to translate back.
-
-        ---
-        ### **Fundamental Rules of Operation**
-        1.  **Tool Usage is Mandatory:** When you do not know the answer, you MUST use your tools to find it. Your primary goal is to find factual information from public sources to answer the user's question. For questions about current weather, climate, or market prices, you should use the `TavilySearchResults` tool.
-        2.  **Strict Domain Adherence:** Your domain is exclusively agriculture in India. If a user asks a question that is not related to agriculture, or if the question is too vague (e.g., "tell me something"), you MUST politely state your purpose and offer examples of what you can help with. For example: "I am Agri-Advisor, your farming assistant. I can answer questions about crop management, government schemes, or market prices. What would you like to know?" Do not use your tools for non-agricultural queries.
-        3.  **Grounding and Hallucination Prevention:** If you use your tools and still cannot find the necessary information to answer the user's question, you are REQUIRED to respond with one of the following specific phrases:
-            - "I could not find enough information from public sources to answer this question."
-            - "The available tools did not provide specific details on that topic."
-            Never invent information.
-        4.  **India-Centric Focus:** All your advice, data retrieval, and synthesis MUST be specific to the context of India. You should always assume the user's query is in the context of India, even if they do not explicitly mention the country. This includes weather patterns, crop cycles, soil types, market prices, and central/state government policies.
-        5.  **Tool Query Modification:** When you decide to use a search tool, you MUST append "in India" to the search query to ensure the results are geographically relevant. For example, if the user asks "what is the weather like?", your Action Input for the search tool should be "weather in India". This is a critical rule. If a user mentions a specific state or district, prioritize that in your search (e.g., "weather in Pune, Maharashtra, India").
-        6.  **Proactive Context Gathering (CRITICAL DIRECTIVE):** When a user's query is time-sensitive (e.g., 'today', 'tomorrow') AND location-specific (e.g., 'in Kharagpur'), you have a non-negotiable, primary directive:
-            - **Step 1:** You MUST immediately use your `TavilySearchResults` tool to find the current weather forecast for that location.
-            - **Step 2:** If the query also requires information about a crop's needs (like temperature or rainfall tolerance), you MUST use your tools to find that information as well.
-            - **Step 3:** Synthesize the weather data with the crop data to provide a complete answer.
-            - **ABSOLUTE RULE:** You are forbidden from asking the user for information that you can find with your tools, such as weather forecasts or general crop requirements. You must find it yourself.
-
-        ---
-        ### **Answer Structure and Formatting Protocol**
-        You must structure your answers in a clear, predictable way to build user trust and improve readability.
-
-        1.  **Structured Answer:** Begin with a clear summary sentence that directly addresses the user's question.
-        2.  **Detailed Explanation & Sourcing:** Following the summary, provide an extremely detailed, in-depth explanation. Synthesize information, explain the nuances, and provide comprehensive background. You MUST NOT mention the name of the tool you used (e.g., "Wikipedia") or use phrases that reveal you are searching (e.g., "Based on my research," "several sources indicate"). You must present the information directly and authoritatively.
-        3.  **Actionable Advice (If Applicable):** If you find actionable steps or recommendations, list them clearly using bullet points, explaining the rationale behind each step.
-        4.  **Detail and Depth:** Your answers must be as detailed and comprehensive as possible, aiming to be a definitive resource on the topic. Provide context, explain underlying principles, and explore related concepts.
-        5.  **Length Constraint:** While your answers must be detailed, they must NOT exceed 100 lines in total length. You must provide the most thorough answer possible within this limit.
-        6.  **Proactive Follow-up:** After providing a complete and detailed answer, always conclude your response by asking a relevant follow-up question to anticipate the user's next need. For example, if you explain a government scheme, you could ask, "Would you like to know the eligibility criteria for this scheme?" or if you describe a pest, you could ask, "Would you like to know about common treatments for this pest?" This makes you a more helpful and proactive advisor.
-
-        ---
-        ### **Detailed Thematic Guidance**
-        When answering questions on these specific themes, apply the following logic:
-
-        #### **On Climate and Weather:**
-        - When a user asks for the climate or weather in a specific Indian city, use your search tool to find this information.
-        - Provide key details such as temperature, humidity, chance of precipitation, and wind speed.
-        - Relate the weather information back to agriculture. For example, "The high humidity might increase the risk of fungal diseases for certain crops."
-
-        #### **On Crop Management (Irrigation, Seeds, Pests):**
-        - Use your tools to find information relevant to specific conditions in India (e.g., soil type, weather).
-        - Synthesize information from multiple sources if necessary to provide a comprehensive answer.
-        - Example: For a question about rice pests in West Bengal, use your tools to find common pests in that region and their management strategies.
-        - Prioritize information from Indian agricultural bodies like ICAR (Indian Council of Agricultural Research) if found.
-
-        #### **On Finance and Policy (Credit, Subsidies, Schemes):**
-        - Use your tools to find details on Indian government schemes (e.g., PM-KISAN, Fasal Bima Yojana).
-        - Be precise with numbers and eligibility criteria found through your search.
-        - Your role is to inform based on public data, not to recommend a specific financial product.
-        - Always mention the official government source if the information is available.
-
-        #### **On Market Prices and Harvest Decisions:**
-        - Use your search tool to find current or historical market price trends for crops in India.
-        - Specify the market (mandi) if the information is available.
-        - Report the information neutrally. Do not make market predictions.
-
-        #### **On Soil Health and Fertilizers:**
-        - Provide information on soil types common in India (e.g., Alluvial, Black, Red, Laterite).
-        - Explain the NPK (Nitrogen, Phosphorus, Potassium) ratio in simple terms.
-        - Suggest organic alternatives if the information is available in your search results.
-
-        ---
-        ### **Safety and Ethical Guidelines**
-        - **No Dangerous Advice:** Under no circumstances should you provide advice that could be harmful. If you find such information, summarize it cautiously and add a disclaimer, for example: "Some sources describe a procedure for pest control, which should be handled with extreme care and professional guidance."
-        - **No Personal Opinions:** You are an AI and have no personal opinions. Your responses must be neutral and based solely on the information found by your tools.
-        - **Acknowledge Limitations:** You are a tool to assist with decision-making, not to make a decision for the user. Your purpose is to provide information to help the user make a more informed choice.
-        - **Data Privacy:** Do not ask for or store any personally identifiable information (PII) from the user, such as their name, phone number, or specific land details.
-
-        ---
-        ### **Conversation Flow and Interaction Style**
-        - **Clarification:** If a user's query is ambiguous, ask for clarification before using your tools. For example, if they ask about "cotton," you might ask, "Are you interested in the cultivation of cotton, market prices, or government subsidies for cotton farmers?"
-        - **Handling Follow-ups:** Pay close attention to the chat history to understand the context of follow-up questions.
-        - **Error Handling:** If a tool fails or returns an error, do not expose the technical error to the user. Simply state that you were unable to find the information.
-        - **Positive Reinforcement:** Use encouraging and positive language. Phrases like "That's a great question" or "I can certainly help with that" can make the interaction more welcoming.
-
-        ---
-        ### **Final Instruction**
-        Review all the rules above before generating a response. Your performance in this hackathon depends on your ability to be a reliable, grounded, and trustworthy AI advisor for the Indian agricultural community. Your goal is to be the most helpful and comprehensive resource possible within the defined constraints.
-        """
-    
+    # Compiled once here; only {current_date} is filled in per request.
+    system_prompt = get_agent_system_prompt(parallel_tools=(mode == "tool_calling"))
+    prompt_budget = PromptBudget(system_prompt)
+
+    if mode == "tool_calling":
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", system_prompt),
+                MessagesPlaceholder("chat_history", optional=True),
+                ("human", "{input}"),
+                MessagesPlaceholder("agent_scratchpad"),
+            ]
+        )
+        agent = create_tool_calling_agent(llm, tools, prompt)
+        # Tool observations are trimmed before they are written into the scratchpad.
+        executor = AgentExecutor(
+            agent=agent,
+            tools=tools,
+            verbose=settings.AGENT_VERBOSE,
+            max_iterations=settings.AGENT_MAX_ITERATIONS,
+            handle_parsing_errors=True,
+            trim_intermediate_steps=prompt_budget.fit_observations,
+        )
+        return DeadlineAgent(executor, llm, prompt_budget=prompt_budget)
+
+    # The ReAct agent builds its prompt from a text prefix, so the system prompt goes
+    # there, with current_date declared as a per-request input variable.
     agent_kwargs = {
-        "system_message": SystemMessage(content=system_prompt),
+        "prefix": system_prompt + REACT_TOOLS_HEADER,
+        "input_variables": ["input", "chat_history", "agent_scratchpad", "current_date"],
     }
 
-    return initialize_agent(
+    executor = initialize_agent(
         tools=tools,
         llm=llm,
         agent=AgentType.CONVERSATIONAL_REACT_DESCRIPTION,
-        memory=memory,
-        verbose=True,
-        max_iterations=8,
+        verbose=settings.AGENT_VERBOSE,
+        max_iterations=settings.AGENT_MAX_ITERATIONS,
         handle_parsing_errors=True,
         agent_kwargs=agent_kwargs,
+        # The same trimming applies to the ReAct scratchpad's observations.
+        trim_intermediate_steps=prompt_budget.fit_observations,
     )
+    return DeadlineAgent(executor, llm, prompt_budget=prompt_budget, history_as_text=True)
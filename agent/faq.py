@@ -0,0 +1,251 @@
+import argparse
+import asyncio
+import datetime
+import hashlib
+import json
+import os
+import re
+import numpy as np
+from agent.rag_agent import build_rag_chain, get_embeddings, is_fallback_answer, vectorstore_signature
+from agent.suggestions import build_suggestion_chain, parse_suggestions
+from config.settings import settings
+
+# Define the path for the precomputed FAQ answers
+FAQ_INDEX_PATH = "core/faqindex/faq.json"
+
+# Words dropped before exact matching, so "What is PM-KISAN?" and "Tell me about PM KISAN" agree.
+FILLER_WORDS = {
+    "a", "an", "the", "is", "are", "what", "whats", "tell", "me", "about", "please",
+    "can", "could", "you", "i", "do", "does", "of", "to", "kindly", "explain",
+}
+
+# (path, mtime, size) -> sha256, so unchanged files are not re-hashed on every check.
+_hash_cache = {}
+
+
+def normalize_question(text):
+    """Lowercases, strips punctuation and filler words: 'What is PM-KISAN?' -> 'pm kisan'."""
+    words = re.sub(r"[^a-z0-9 ]", " ", text.lower()).split()
+    return " ".join(word for word in words if word not in FILLER_WORDS)
+
+
+def _file_hash(path):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime, stat.st_size)
+    if key not in _hash_cache:
+        with open(path, "rb") as f:
+            _hash_cache[key] = hashlib.sha256(f.read()).hexdigest()
+    return _hash_cache[key]
+
+
+def is_entry_fresh(entry):
+    """True if every document the entry's answer was built from is unchanged. Entries citing no documents are never fresh."""
+    if not entry["sources"]:
+        return False
+    for path, digest in entry["sources"].items():
+        if not os.path.exists(path) or _file_hash(path) != digest:
+            return False
+    return True
+
+
+def load_faq_questions(path=None):
+    """Reads the curated FAQ list: one question per line, '#' starts a comment."""
+    path = path or settings.FAQ_QUESTIONS_PATH
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        lines = [line.split("#", 1)[0].strip() for line in f]
+    return [line for line in lines if line]
+
+
+class FaqIndex:
+    """
+    Precomputed answers matched by normalized question text, or by cosine
+    similarity of question embeddings. Entries whose cited documents have
+    changed are never served.
+
+    `skipped` lists curated questions the documents could not answer, or whose
+    answer cited no document that could be found on disk. They are not retried
+    until the vector store is rebuilt from different documents.
+    """
+
+    def __init__(self, entries, threshold=None, skipped=None):
+        self.threshold = threshold if threshold is not None else settings.FAQ_MATCH_THRESHOLD
+        self.entries = [entry for entry in entries if is_entry_fresh(entry)]
+        self.stale = len(entries) - len(self.entries)
+        self._by_text = {entry["normalized"]: entry for entry in self.entries}
+        signature = vectorstore_signature() if skipped else None
+        self.skipped = {item["normalized"] for item in skipped or [] if item["index_signature"] == signature}
+
+        embedded = [entry for entry in self.entries if entry.get("embedding")]
+        self._embedded = embedded
+        self._matrix = None
+        if embedded:
+            matrix = np.array([entry["embedding"] for entry in embedded], dtype=np.float32)
+            self._matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    @property
+    def empty(self):
+        return not self.entries
+
+    def match_text(self, text):
+        entry = self._by_text.get(normalize_question(text))
+        return entry if entry and is_entry_fresh(entry) else None
+
+    def match_embedding(self, vector):
+        if self._matrix is None:
+            return None
+        vector = np.asarray(vector, dtype=np.float32)
+        scores = self._matrix @ (vector / np.linalg.norm(vector))
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        entry = self._embedded[best]
+        return entry if is_entry_fresh(entry) else None
+
+    def missing(self, questions):
+        """Questions from the curated list that have no fresh entry and were not skipped against the current documents."""
+        return [
+            q for q in questions
+            if normalize_question(q) not in self._by_text and normalize_question(q) not in self.skipped
+        ]
+
+
+def _read_index():
+    if not os.path.exists(FAQ_INDEX_PATH):
+        return {"entries": [], "skipped": []}
+    with open(FAQ_INDEX_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    data.setdefault("skipped", [])
+    return data
+
+
+def load_faq_index():
+    """Loads the FAQ index from FAQ_INDEX_PATH, dropping entries whose sources changed."""
+    data = _read_index()
+    index = FaqIndex(data["entries"], skipped=data["skipped"])
+    print(f"Loaded {len(index.entries)} FAQ answers ({index.stale} stale).")
+    return index
+
+
+_faq_index = None
+
+
+def get_faq_index():
+    """Returns the process-wide FAQ index, loading it on first use."""
+    global _faq_index
+    if _faq_index is None:
+        _faq_index = load_faq_index()
+    return _faq_index
+
+
+def answer_faq_query(text):
+    """Returns the precomputed answer entry for a question matching an FAQ by normalized text, or None."""
+    try:
+        return get_faq_index().match_text(text)
+    except Exception as e:
+        print(f"FAQ index unavailable: {e}")
+        return None
+
+
+def _skipped_item(question, normalized, signature, reason):
+    return {
+        "question": question,
+        "normalized": normalized,
+        "reason": reason,
+        "index_signature": signature,
+        "checked_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+async def build_faq_index(rag_chain, suggestion_chain, embeddings, questions=None, force=False, run=None):
+    """
+    Generates answers, suggestions and embeddings for each curated question
+    against the current vector store and saves them to FAQ_INDEX_PATH.
+
+    Only questions that are new, or whose cited documents changed, are
+    regenerated unless `force` is set. Questions the documents cannot answer,
+    and answers whose cited documents cannot all be found (so staleness could
+    not be checked), are recorded as skipped with the vector store signature
+    and only retried once the documents change. `run(call)` lets the API run the calls
+    at its chosen scheduler priority; by default they are awaited directly.
+    Each Gemini and embedding request is admitted by its own limiter.
+    """
+    global _faq_index
+    questions = questions if questions is not None else load_faq_questions()
+    if run is None:
+        async def run(call):
+            return await call()
+
+    data = _read_index()
+    previous = {entry["normalized"]: entry for entry in data["entries"]}
+    previous_skipped = {item["normalized"]: item for item in data["skipped"]}
+    signature = vectorstore_signature()
+    entries, skipped = [], []
+    for question in questions:
+        normalized = normalize_question(question)
+        entry = previous.get(normalized)
+        if entry and not force and is_entry_fresh(entry):
+            entries.append(entry)
+            continue
+        item = previous_skipped.get(normalized)
+        if item and not force and item["index_signature"] == signature:
+            skipped.append(item)
+            continue
+
+        try:
+            result = await run(lambda: rag_chain.ainvoke({"input": question, "chat_history": []}))
+            answer = result.get("answer", "").strip()
+            if is_fallback_answer(answer):
+                print(f"⚠️ No answer in the documents for FAQ '{question}'. Skipping.")
+                skipped.append(_skipped_item(question, normalized, signature, "no_answer"))
+                continue
+
+            sources = sorted({doc.metadata["source"] for doc in result.get("context", []) if "source" in doc.metadata})
+            if not sources or not all(os.path.exists(path) for path in sources):
+                print(f"⚠️ FAQ '{question}' cites no documents that can be found, so it could never go stale. Skipping.")
+                skipped.append(_skipped_item(question, normalized, signature, "unresolved_sources"))
+                continue
+            suggestion_text = await run(lambda: suggestion_chain.ainvoke({"query": question, "response": answer}))
+            embedding = await run(lambda: embeddings.aembed_query(question))
+        except Exception as e:
+            print(f"❌ Error generating FAQ '{question}': {e}. Skipping.")
+            continue
+
+        entries.append({
+            "question": question,
+            "normalized": normalized,
+            "answer": answer,
+            "suggestions": parse_suggestions(suggestion_text),
+            "sources": {path: _file_hash(path) for path in sources},
+            "embedding": [float(x) for x in embedding],
+            "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+        print(f"✅ Generated FAQ answer for: {question}")
+
+    os.makedirs(os.path.dirname(FAQ_INDEX_PATH), exist_ok=True)
+    with open(FAQ_INDEX_PATH, "w", encoding="utf-8") as f:
+        json.dump({"entries": entries, "skipped": skipped}, f, ensure_ascii=False)
+
+    _faq_index = FaqIndex(entries, skipped=skipped)
+    print(f"FAQ index saved with {len(entries)} answers ({len(skipped)} questions skipped).")
+    return _faq_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute FAQ answers against the current vector store.")
+    parser.add_argument("--questions", default=settings.FAQ_QUESTIONS_PATH, help="File with one question per line.")
+    parser.add_argument("--force", action="store_true", help="Regenerate every entry, not just stale ones.")
+    args = parser.parse_args()
+
+    asyncio.run(build_faq_index(
+        build_rag_chain(),
+        build_suggestion_chain(),
+        get_embeddings(),
+        questions=load_faq_questions(args.questions),
+        force=args.force,
+    ))
+
+
+if __name__ == "__main__":
+    main()
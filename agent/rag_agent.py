@@ -1,15 +1,39 @@
+import hashlib
+import json
 import os
 import re
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from langchain_community.vectorstores import FAISS
-from langchain.chains import create_retrieval_chain, create_history_aware_retriever
+from langchain.chains import create_history_aware_retriever
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from core.rag_loder import load_documents
+from langchain_core.runnables import RunnablePassthrough
+from core.rag_loder import load_documents, DOCUMENT_EXTENSIONS
+from core.prompt_budget import PromptBudget, count_tokens
+from core.scheduler import get_scheduler
+from agent.prompts import get_qa_system_prompt
 from config.settings import Settings
 
 # Define the path for the local vector store
 VECTORSTORE_PATH = "core/vectorstore"
+EMBEDDING_MODEL = "models/embedding-001"
+
+# Phrases the QA prompt uses when the documents cannot answer a question.
+FALLBACK_PHRASES = ["don't know", "do not have enough information", "cannot answer"]
+
+def is_fallback_answer(text):
+    """Returns True if a RAG answer is empty or one of the prompt's 'cannot answer' replies."""
+    return not text or any(phrase in text.lower() for phrase in FALLBACK_PHRASES)
+
+def get_embeddings():
+    """
+    Returns the Google embedding model used for the vector store. Each request
+    it makes is admitted through the scheduler's embedding limiter.
+    """
+    return get_scheduler().embeddings(GoogleGenerativeAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        google_api_key=os.getenv("GOOGLE_API_KEY")
+    ))
 
 def sanitize_text(text):
     """
@@ -20,10 +44,34 @@ def sanitize_text(text):
     sanitized = re.sub(r'\s+', ' ', sanitized).strip()
     return sanitized
 
+def vectorstore_signature(doc_folder="document"):
+    """
+    Digest of the source documents (name, mtime, size) and the chunking and
+    embedding settings the vector store is built with. It changes whenever the
+    store would need rebuilding.
+    """
+    files = []
+    if os.path.exists(doc_folder):
+        files = [
+            (file, os.path.getmtime(os.path.join(doc_folder, file)), os.path.getsize(os.path.join(doc_folder, file)))
+            for file in sorted(os.listdir(doc_folder))
+            if file.endswith(DOCUMENT_EXTENSIONS)
+        ]
+    payload = {"files": files, "chunk_size": Settings.CHUNK_SIZE, "chunk_overlap": Settings.CHUNK_OVERLAP, "model": EMBEDDING_MODEL}
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+def _saved_signature():
+    path = os.path.join(VECTORSTORE_PATH, "signature.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("signature")
+
 def create_vectorstore():
     """
     Loads documents and creates a FAISS vector store using Google's embedding model.
     """
+    signature = vectorstore_signature()
     print("Loading documents for vector store creation...")
     docs = load_documents()
     
@@ -46,15 +94,14 @@ def create_vectorstore():
 
     try:
         print("Initializing Google Embeddings model...")
-        embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/embedding-001",
-            google_api_key=os.getenv("GOOGLE_API_KEY")
-        )
+        embeddings = get_embeddings()
         
         print("Creating FAISS vector store from documents...")
         vectorstore = FAISS.from_documents(verified_docs, embeddings)
 
         vectorstore.save_local(VECTORSTORE_PATH)
+        with open(os.path.join(VECTORSTORE_PATH, "signature.json"), "w", encoding="utf-8") as f:
+            json.dump({"signature": signature}, f)
         print("Vector store created and saved successfully.")
         return vectorstore
         
@@ -64,15 +111,13 @@ def create_vectorstore():
 
 def load_vectorstore():
     """
-    Loads the FAISS vector store with Google embeddings. If it doesn't exist,
-    it calls create_vectorstore() to build a new one.
+    Loads the FAISS vector store with Google embeddings. If it doesn't exist, or
+    the documents in document/ were added, removed or modified since it was
+    built, it calls create_vectorstore() to build a new one.
     """
-    embeddings = GoogleGenerativeAIEmbeddings(
-        model="models/embedding-001",
-        google_api_key=os.getenv("GOOGLE_API_KEY")
-    )
+    embeddings = get_embeddings()
 
-    if os.path.exists(os.path.join(VECTORSTORE_PATH, "index.faiss")):
+    if os.path.exists(os.path.join(VECTORSTORE_PATH, "index.faiss")) and _saved_signature() == vectorstore_signature():
         print("Loading existing FAISS index from local path.")
         return FAISS.load_local(
             VECTORSTORE_PATH,
@@ -80,7 +125,7 @@ def load_vectorstore():
             allow_dangerous_deserialization=True
         )
     
-    print("FAISS index not found. Creating a new one...")
+    print("FAISS index missing or stale. Creating a new one...")
     return create_vectorstore()
 
 def build_rag_chain():
@@ -88,12 +133,14 @@ def build_rag_chain():
     Builds a RAG chain with an improved history-aware retriever.
     """
     vectorstore = load_vectorstore()
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
+    retriever = vectorstore.as_retriever(search_kwargs={"k": Settings.RETRIEVER_K})
     
     llm = ChatGoogleGenerativeAI(
         model=Settings.MODEL,
         temperature=Settings.TEMPERATURE,
-        google_api_key=os.getenv("GOOGLE_API_KEY")
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        max_retries=Settings.LLM_CLIENT_RETRIES,
+        rate_limiter=get_scheduler().rate_limiter("gemini"),
     )
 
     contextualize_q_system_prompt = (
@@ -114,73 +161,8 @@ def build_rag_chain():
         llm, retriever, contextualize_q_prompt
     )
 
-    # --- NEW HACKATHON-SPECIFIC PROMPT (EXTENDED) ---
-    qa_system_prompt = (
-        """
-        You are 'Agri-Advisor', an advanced, human-aligned AI agent. Your purpose is to serve as a specialized expert for the Capital One Launchpad innovation challenge. Your entire existence is dedicated to assisting the Indian agricultural sector.
-
-        ---
-        ### **Core Directive**
-        Your primary function is to act as an AI-powered advisor for agri-related queries in India. You will answer questions by synthesizing information exclusively from the document excerpts provided to you in the 'Context' section. You have no memory or knowledge beyond what is in the provided context.
-
-        ---
-        ### **Persona and Audience**
-        - **Your Persona:** You are a knowledgeable, patient, and trustworthy advisor. Your tone should be professional, empathetic, and clear. You are not a casual chatbot; you are a professional tool designed for critical decision-making.
-        - **Your Audience:** You are speaking to farmers, financiers, vendors, and other stakeholders in the Indian agricultural industry. Many users may have low digital literacy. Your language must be simple, direct, and easy to understand. Avoid complex jargon at all costs.
-
-        ---
-        ### **Fundamental Rules of Operation**
-        1.  **Context is Absolute:** Your ONLY source of truth is the text provided under "Context". Every part of your answer must be derived directly from this information. Do not invent, infer, or use any external knowledge.
-        2.  **Strict Domain Adherence:** Your domain is exclusively agriculture in India. If the provided context does not appear to be related to agriculture, you must state that the information provided is outside your scope.
-        3.  **Grounding and Hallucination Prevention:** If the provided context does not contain the necessary information to answer the user's question, you are REQUIRED to respond with one of the following specific phrases:
-            - "I do not have enough information from the provided documents to answer this question."
-            - "The provided documents do not contain specific details on that topic."
-        4.  **No External Knowledge:** Do not mention the internet, other websites, or any information not present in the context. Your world is defined by the documents given to you for each query.
-
-        ---
-        ### **Answer Structure and Formatting Protocol**
-        You must structure your answers in a clear, predictable way to build user trust and improve readability.
-
-        1.  **Direct Answer First:** Begin with a direct, concise answer to the user's question.
-        2.  **Supporting Details:** In a new paragraph, provide the key details and explanations that support your direct answer, citing information directly from the context.
-        3.  **Actionable Advice (If Applicable):** If the context provides actionable steps or recommendations, list them clearly using bullet points.
-        4.  **Conciseness:** Keep your final answer to a maximum of 4-5 sentences unless the query explicitly asks for a detailed explanation. Brevity is critical for users with low digital access.
-
-        ---
-        ### **Detailed Thematic Guidance**
-        When answering questions on these specific themes, apply the following logic:
-
-        #### **On Crop Management (Irrigation, Seeds, Pests):**
-        - Focus on the specific conditions mentioned in the context (e.g., soil type, weather).
-        - If the context mentions a specific region in India, ensure your answer reflects that.
-        - Example: If the context says "In West Bengal, the Swarna variety of rice is suitable for clay soil," and the user asks about rice in that region, you should highlight the Swarna variety.
-
-        #### **On Finance and Policy (Credit, Subsidies, Schemes):**
-        - Be precise with numbers, eligibility criteria, and scheme names mentioned in the context.
-        - Do not provide financial advice beyond what is explicitly stated in the documents.
-        - Your role is to inform, not to recommend a specific financial product.
-        - Example: If the context describes the PM-KISAN scheme, you should only state the facts presented (e.g., "The PM-KISAN scheme provides eligible farmers with an income support of ₹6,000 per year, according to the document.").
-
-        #### **On Market Prices and Harvest Decisions:**
-        - Report market prices or trends exactly as they are written in the context.
-        - Do not make market predictions.
-        - If the context provides pros and cons for waiting to sell a harvest, present them neutrally.
-
-        ---
-        ### **Safety and Ethical Guidelines**
-        - **No Dangerous Advice:** Under no circumstances should you provide advice that could be harmful, such as instructions on mixing chemicals or performing dangerous tasks. If the context contains such information, you should summarize it cautiously, for example: "The document describes a procedure for pest control, which you should review carefully."
-        - **No Personal Opinions:** You are an AI and have no personal opinions or beliefs. Your responses must be neutral and based solely on the provided text.
-        - **Acknowledge Limitations:** You are a tool to assist with decision-making, not to make decisions for the user. Your purpose is to provide information from the documents to help the user make a more informed choice.
-
-        ---
-        ### **Final Instruction**
-        Review all the rules above before generating a response. Your performance in this hackathon depends on your ability to be a reliable, grounded, and trustworthy AI advisor for the Indian agricultural community, using only the documents provided to you.
-
-        Context:
-        {context}
-        """
-    )
-    # ------------------------------------
+    # The QA prompt text lives in agent/prompts.py, in full and compact profiles.
+    qa_system_prompt = get_qa_system_prompt()
     
     qa_prompt = ChatPromptTemplate.from_messages(
         [
@@ -190,7 +172,25 @@ def build_rag_chain():
     )
 
     question_answer_chain = create_stuff_documents_chain(llm, qa_prompt)
-    rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
+
+    # Same shape as create_retrieval_chain(), with chat history and retrieved
+    # documents trimmed to the prompt budget before each LLM call.
+    history_budget = PromptBudget(contextualize_q_system_prompt)
+    qa_budget = PromptBudget(qa_system_prompt)
+    rag_chain = (
+        RunnablePassthrough.assign(
+            chat_history=lambda x: history_budget.fit_history(x.get("chat_history", []), reserved=count_tokens(x["input"])),
+        )
+        .assign(context=history_aware_retriever.with_config(run_name="retrieve_documents"))
+        .assign(context=lambda x: qa_budget.fit_documents(x["context"], reserved=count_tokens(x["input"])))
+        # Token counts per LLM call. The contextualize call only sees the history and
+        # is skipped when there is none; the QA call sees the documents, not the history.
+        .assign(prompt_tokens=lambda x: {
+            "contextualize": history_budget.report(history=x["chat_history"], input=x["input"]) if x["chat_history"] else None,
+            "answer": qa_budget.report(context=[doc.page_content for doc in x["context"]], input=x["input"]),
+        })
+        .assign(answer=question_answer_chain)
+    ).with_config(run_name="retrieval_chain")
     
     print("RAG chain built successfully with improved retriever.")
     return rag_chain
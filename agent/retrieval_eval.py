@@ -0,0 +1,192 @@
+import argparse
+import itertools
+import json
+import re
+import time
+import zlib
+import faiss
+import numpy as np
+import pandas as pd
+from langchain_core.embeddings import Embeddings
+from agent.rag_agent import sanitize_text
+from core.rag_loder import load_documents, split_documents
+from config.settings import settings
+
+EVAL_QUESTIONS_PATH = "config/retrieval_eval.jsonl"
+INDEX_TYPES = ("flat", "hnsw", "ivf")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic, offline embedder: word unigrams and bigrams are hashed with
+    CRC32 into a fixed number of signed buckets and L2-normalized. It is much
+    weaker than a neural embedder but stable across runs and machines, which is
+    what comparing chunking and index settings needs.
+    """
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def _embed(self, text):
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = zlib.crc32(feature.encode("utf-8"))
+            vector[digest % self.dim] += 1.0 if (digest >> 16) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts):
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text).tolist()
+
+
+def load_eval_questions(path=EVAL_QUESTIONS_PATH):
+    """
+    Reads the labeled question set: one JSON object per line with a 'question',
+    a list of alternative 'evidence' phrases (a chunk containing any one of them
+    is relevant), and an optional 'source' substring the chunk's file name must contain.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _is_relevant(chunk, label):
+    if label.get("source") and label["source"].lower() not in chunk.metadata.get("source", "").lower():
+        return False
+    content = chunk.page_content.lower()
+    return any(phrase.lower() in content for phrase in label["evidence"])
+
+
+def score_ranking(top, label):
+    """
+    Scores one question's top-k chunks: (hit, reciprocal rank). hit is 1.0 if
+    any of them is relevant, so a question labeled with alternative phrasings
+    ('6,000' or '6000') scores 1.0 as soon as one relevant chunk is retrieved.
+    """
+    rank = next((r for r, chunk in enumerate(top, 1) if _is_relevant(chunk, label)), None)
+    return (1.0, 1 / rank) if rank else (0.0, 0.0)
+
+
+def build_index(index_type, vectors, nprobe=8):
+    """Builds a FAISS index of the given type over the chunk vectors (L2, as in production)."""
+    dim = vectors.shape[1]
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, 32)
+        index.hnsw.efSearch = 64
+    elif index_type == "ivf":
+        nlist = max(1, int(np.sqrt(len(vectors))))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+        index.train(vectors)
+        index.nprobe = min(nprobe, nlist)
+    else:
+        raise ValueError(f"Unknown index type '{index_type}'. Choose from {INDEX_TYPES}.")
+    index.add(vectors)
+    return index
+
+
+def evaluate_config(pages, questions, embedder, chunk_size, chunk_overlap, index_type, k_values, repeats=5):
+    """
+    Chunks the pages, builds one index and scores it for every k. Returns one
+    result row per k with hit@k (the share of questions with a relevant chunk
+    in the top k), MRR@k, build time, index size and search latency percentiles.
+    """
+    started = time.perf_counter()
+    chunks = []
+    for chunk in split_documents(pages, chunk_size=chunk_size, chunk_overlap=chunk_overlap):
+        chunk.page_content = sanitize_text(chunk.page_content)
+        if chunk.page_content:
+            chunks.append(chunk)
+    vectors = np.array(embedder.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+    index = build_index(index_type, vectors)
+    build_seconds = time.perf_counter() - started
+    index_bytes = faiss.serialize_index(index).nbytes
+
+    query_vectors = np.array([embedder.embed_query(q["question"]) for q in questions], dtype=np.float32)
+    max_k = max(k_values)
+    latencies = []
+    rankings = []
+    for vector in query_vectors:
+        for _ in range(repeats):
+            t = time.perf_counter()
+            _, ids = index.search(vector.reshape(1, -1), max_k)
+            latencies.append((time.perf_counter() - t) * 1000)
+        rankings.append([i for i in ids[0] if i >= 0])
+
+    rows = []
+    for k in k_values:
+        scores = [score_ranking([chunks[i] for i in ranking[:k]], label) for label, ranking in zip(questions, rankings)]
+        hits = [hit for hit, _ in scores]
+        reciprocal_ranks = [reciprocal_rank for _, reciprocal_rank in scores]
+
+        rows.append({
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "index": index_type,
+            "k": k,
+            "chunks": len(chunks),
+            "hit": round(float(np.mean(hits)), 3),
+            "mrr": round(float(np.mean(reciprocal_ranks)), 3),
+            "build_s": round(build_seconds, 3),
+            "index_kb": round(index_bytes / 1024, 1),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        })
+    return rows
+
+
+def run_grid(chunk_sizes, chunk_overlaps, index_types, k_values, questions_path=EVAL_QUESTIONS_PATH,
+             doc_folder="document", embedder=None):
+    """Evaluates every (chunk size, overlap, index type) combination and returns a results DataFrame."""
+    embedder = embedder or HashingEmbeddings()
+    questions = load_eval_questions(questions_path)
+    pages = load_documents(doc_folder, split=False)
+    if not pages:
+        raise ValueError("Document loading returned no content. Nothing to evaluate.")
+
+    rows = []
+    for chunk_size, chunk_overlap, index_type in itertools.product(chunk_sizes, chunk_overlaps, index_types):
+        if chunk_overlap >= chunk_size:
+            continue
+        print(f"Evaluating chunk_size={chunk_size}, overlap={chunk_overlap}, index={index_type}...")
+        rows.extend(evaluate_config(pages, questions, embedder, chunk_size, chunk_overlap, index_type, k_values))
+    return pd.DataFrame(rows)
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid-search chunking, index type and k on a labeled question set.")
+    parser.add_argument("--chunk-sizes", type=_int_list, default=[500, settings.CHUNK_SIZE, 1000])
+    parser.add_argument("--overlaps", type=_int_list, default=[0, settings.CHUNK_OVERLAP, 150])
+    parser.add_argument("--index", default=",".join(INDEX_TYPES), help=f"Comma-separated subset of {INDEX_TYPES}.")
+    parser.add_argument("--k", type=_int_list, default=[1, settings.RETRIEVER_K, 5])
+    parser.add_argument("--questions", default=EVAL_QUESTIONS_PATH)
+    parser.add_argument("--docs", default="document")
+    parser.add_argument("--output", help="Optional CSV path for the results table.")
+    args = parser.parse_args()
+
+    results = run_grid(
+        args.chunk_sizes,
+        args.overlaps,
+        [t.strip() for t in args.index.split(",") if t.strip()],
+        sorted(set(args.k)),
+        questions_path=args.questions,
+        doc_folder=args.docs,
+    )
+    results = results.sort_values(["hit", "mrr", "p95_ms"], ascending=[False, False, True])
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from core.llm import load_llm
+
+def build_suggestion_chain(llm=None):
+    """
+    Builds a chain that proposes three follow-up questions for a query and the bot's response.
+    The chain returns a comma-separated string; use parse_suggestions() to split it.
+    """
+    llm = llm or load_llm()
+
+    # New, more detailed prompt for generating high-quality suggestions.
+    suggestion_prompt = PromptTemplate.from_template(
+        "You are an expert AI assistant for an agricultural bot named 'Agri-Advisor'. Your task is to generate 3 highly relevant and insightful follow-up questions based on a user's query and the bot's response. These suggestions should anticipate the user's next logical thought and guide them towards deeper knowledge.\n\n"
+        "**Rules for Generating Suggestions:**\n"
+        "1.  **Be Proactive:** Think like an expert advisor. What would a farmer or agricultural professional ask next?\n"
+        "2.  **Be Specific:** Avoid generic questions. The suggestions should be directly related to the topics, crops, or schemes mentioned in the conversation.\n"
+        "3.  **Cover Different Angles:** Try to provide suggestions that explore different facets of the topic, such as:\n"
+        "    - **Practical Application:** How can the user apply this information? (e.g., 'What is the step-by-step process to apply for this scheme?')\n"
+        "    - **Financial Implications:** What are the costs or benefits? (e.g., 'What is the estimated cost of this fertilizer per acre?')\n"
+        "    - **Deeper Dive:** Ask for more detail on a sub-topic. (e.g., 'Tell me more about the specific pests that affect the Swarna rice variety.')\n"
+        "4.  **Format:** Return the questions as a single, comma-separated string. Do not include numbers, bullet points, or any other formatting.\n\n"
+        "**Example:**\n"
+        "User Query: 'What is the PM-KISAN scheme?'\n"
+        "Bot Response: 'The PM-KISAN scheme is a government initiative that provides income support of ₹6,000 per year to eligible farmer families.'\n"
+        "Suggestions: What are the eligibility criteria for PM-KISAN?, How can I apply for the PM-KISAN scheme?, When is the next installment paid?\n\n"
+        "**Current Conversation:**\n"
+        "User Query: {query}\n"
+        "Bot Response: {response}\n\n"
+        "**Generated Suggestions (comma-separated list):**"
+    )
+    return suggestion_prompt | llm | StrOutputParser()
+
+def parse_suggestions(suggestion_text):
+    """Splits the suggestion chain's comma-separated output into a list of questions."""
+    return [s.strip() for s in suggestion_text.split(',') if s.strip()]
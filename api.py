@@ -1,13 +1,22 @@
 import asyncio
+import json
+import math
 import re
+import time
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict
 
-from core.translation import translate_to_english, translate_back
-from agent.rag_agent import build_rag_chain
+from core.translation import atranslate_to_english, atranslate_back
+from agent.rag_agent import build_rag_chain, get_embeddings, is_fallback_answer
 from agent.conversational import get_conversational_agent
+from agent.suggestions import build_suggestion_chain, parse_suggestions
+from agent.faq import get_faq_index, answer_faq_query, build_faq_index, load_faq_questions
+from config.settings import settings
 from core.llm import load_llm
+from core.price_index import get_price_index, answer_price_query
+from core.scheduler import get_scheduler, Priority, SchedulerRejected
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import HumanMessage, AIMessage
@@ -37,6 +46,8 @@ async def startup_event():
         asyncio.set_event_loop(loop)
     
     models["rag_chain"] = build_rag_chain()
+    models["embeddings"] = get_embeddings()
+    get_price_index()
     models["agent"] = get_conversational_agent()
     
     llm = load_llm()
@@ -57,32 +68,27 @@ async def startup_event():
     )
     models["classifier_chain"] = classifier_prompt | llm | StrOutputParser()
 
-    # --- THIS IS THE FIX ---
-    # New, more detailed prompt for generating high-quality suggestions.
-    suggestion_prompt = PromptTemplate.from_template(
-        "You are an expert AI assistant for an agricultural bot named 'Agri-Advisor'. Your task is to generate 3 highly relevant and insightful follow-up questions based on a user's query and the bot's response. These suggestions should anticipate the user's next logical thought and guide them towards deeper knowledge.\n\n"
-        "**Rules for Generating Suggestions:**\n"
-        "1.  **Be Proactive:** Think like an expert advisor. What would a farmer or agricultural professional ask next?\n"
-        "2.  **Be Specific:** Avoid generic questions. The suggestions should be directly related to the topics, crops, or schemes mentioned in the conversation.\n"
-        "3.  **Cover Different Angles:** Try to provide suggestions that explore different facets of the topic, such as:\n"
-        "    - **Practical Application:** How can the user apply this information? (e.g., 'What is the step-by-step process to apply for this scheme?')\n"
-        "    - **Financial Implications:** What are the costs or benefits? (e.g., 'What is the estimated cost of this fertilizer per acre?')\n"
-        "    - **Deeper Dive:** Ask for more detail on a sub-topic. (e.g., 'Tell me more about the specific pests that affect the Swarna rice variety.')\n"
-        "4.  **Format:** Return the questions as a single, comma-separated string. Do not include numbers, bullet points, or any other formatting.\n\n"
-        "**Example:**\n"
-        "User Query: 'What is the PM-KISAN scheme?'\n"
-        "Bot Response: 'The PM-KISAN scheme is a government initiative that provides income support of ₹6,000 per year to eligible farmer families.'\n"
-        "Suggestions: What are the eligibility criteria for PM-KISAN?, How can I apply for the PM-KISAN scheme?, When is the next installment paid?\n\n"
-        "**Current Conversation:**\n"
-        "User Query: {query}\n"
-        "Bot Response: {response}\n\n"
-        "**Generated Suggestions (comma-separated list):**"
-    )
-    models["suggestion_chain"] = suggestion_prompt | llm | StrOutputParser()
-    # ---------------------
+    models["suggestion_chain"] = build_suggestion_chain(llm)
+
+    faq_index = get_faq_index()
+    if settings.FAQ_AUTO_REFRESH and (faq_index.stale or faq_index.missing(load_faq_questions())):
+        models["faq_refresh"] = asyncio.create_task(_refresh_faq_index())
 
     print("--- Models loaded successfully. API is ready. ---")
 
+async def _refresh_faq_index():
+    """Regenerates new or stale FAQ answers at the lowest priority, behind live traffic."""
+    scheduler = get_scheduler()
+
+    async def run(call):
+        return await scheduler.run(call, priority=Priority.SUGGESTION, max_wait=300)
+
+    print("--- Refreshing FAQ answers in the background... ---")
+    try:
+        await build_faq_index(models["rag_chain"], models["suggestion_chain"], models["embeddings"], run=run)
+    except Exception as e:
+        print(f"--- FAQ refresh failed: {e} ---")
+
 def clean_and_split_for_ui(text: str) -> List[str]:
     """
     Strips markdown and splits the text into a list of lines for easy UI rendering.
@@ -95,82 +101,288 @@ def clean_and_split_for_ui(text: str) -> List[str]:
     lines = text.strip().split('\n')
     return [line.strip() for line in lines if line.strip()]
 
-@app.post("/chat", summary="Get a response from Agri-Bot")
-async def chat_endpoint(request: ChatRequest):
-    """Processes a user's query and returns Agri-Bot's response."""
-    try:
-        query = request.query
-        session_id = request.session_id
+# Characters of a streamed RAG answer to hold back before deciding it is not a fallback reply.
+FALLBACK_PROBE_CHARS = 120
+
+def _rejection(e: SchedulerRejected) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail=str(e),
+        headers={"Retry-After": str(math.ceil(e.retry_after))},
+    )
+
+def _get_history(session_id: str):
+    if session_id not in chat_histories:
+        chat_histories[session_id] = []
+    return [HumanMessage(content=msg["content"]) if msg["type"] == "human" else AIMessage(content=msg["content"]) for msg in chat_histories[session_id]]
+
+def _canned_reply(classification_lower: str):
+    """Returns the fixed reply for non-agricultural intents, or None if the query needs an answer pipeline."""
+    if "greeting" in classification_lower:
+        return "Hello! I am Agri-Advisor. How can I assist you with your farming questions today?"
+    if "showing gratitude" in classification_lower:
+        return "You're welcome! Is there anything else I can help you with regarding agriculture?"
+    if "farewells" in classification_lower:
+        return "Goodbye! Feel free to reach out if you have more agricultural questions."
+    if "conversational" in classification_lower or "being polite" in classification_lower:
+        return "Of course. What would you like to know about agriculture?"
+    if "capability_inquiry" in classification_lower:
+        return None
+    if "off-topic" in classification_lower:
+        return "I am Agri-Bot, your farming assistant. I can only answer questions related to agriculture."
+    return None
 
-        if session_id not in chat_histories:
-            chat_histories[session_id] = []
-        
-        langchain_chat_history = [HumanMessage(content=msg["content"]) if msg["type"] == "human" else AIMessage(content=msg["content"]) for msg in chat_histories[session_id]]
+def _record_turn(session_id: str, query: str, final_response: str) -> str:
+    """Cleans the response for the UI and appends the turn to the session history."""
+    full_response_string = "\n".join(clean_and_split_for_ui(final_response))
+    chat_histories[session_id].append({"type": "human", "content": query})
+    chat_histories[session_id].append({"type": "ai", "content": full_response_string})
+    return full_response_string
 
-        classifier = models["classifier_chain"]
-        classification = await classifier.ainvoke({
+def _event(event_type: str, **fields) -> dict:
+    return {"type": event_type, **fields}
+
+def _direct_answer(query):
+    """Answers from the price index or an exact FAQ match, without any LLM call."""
+    price_answer = answer_price_query(query)
+    if price_answer is not None:
+        return {"response": price_answer, "suggestions": []}
+    entry = answer_faq_query(query)
+    if entry is not None:
+        return {"response": entry["answer"], "suggestions": entry["suggestions"]}
+    return None
+
+async def _precomputed_answer(scheduler, translated_query, original_lang, langchain_chat_history):
+    """Checks the price index and FAQ tier for an agricultural query before the RAG chain runs."""
+    if original_lang != "en":
+        direct = _direct_answer(translated_query)
+        if direct is not None:
+            return direct
+
+    # A follow-up such as "How do I apply for it?" depends on the conversation, so
+    # only stand-alone questions are matched to FAQs by similarity.
+    faq_index = get_faq_index()
+    if faq_index.empty or langchain_chat_history:
+        return None
+    embeddings = models["embeddings"]
+    try:
+        vector = await scheduler.run(
+            lambda: embeddings.aembed_query(translated_query),
+            priority=Priority.ROUTING,
+            retries=0,
+        )
+    except Exception as e:
+        print(f"--- FAQ similarity lookup skipped: {e} ---")
+        return None
+    entry = faq_index.match_embedding(vector)
+    if entry is None:
+        return None
+    return {"response": entry["answer"], "suggestions": entry["suggestions"]}
+
+async def _classify(scheduler, query, langchain_chat_history) -> str:
+    classifier = models["classifier_chain"]
+    # Gemini requests are charged per call by the model's rate limiter, at this priority.
+    classification = await scheduler.run(
+        lambda: classifier.ainvoke({
             "user_input": query,
             "chat_history": langchain_chat_history
-        })
-
-        classification_lower = classification.lower()
-        suggestions = []
-        
-        if "greeting" in classification_lower:
-            final_response = "Hello! I am Agri-Advisor. How can I assist you with your farming questions today?"
-        elif "showing gratitude" in classification_lower:
-            final_response = "You're welcome! Is there anything else I can help you with regarding agriculture?"
-        elif "farewells" in classification_lower:
-            final_response = "Goodbye! Feel free to reach out if you have more agricultural questions."
-        elif "conversational" in classification_lower or "being polite" in classification_lower:
-             final_response = "Of course. What would you like to know about agriculture?"
-        elif "capability_inquiry" in classification_lower:
-            translated_query, original_lang = translate_to_english(query)
-            agent = models["agent"]
-            agent_response = await agent.ainvoke({
-                "input": translated_query,
-                "chat_history": langchain_chat_history
-            })
-            final_response = agent_response.get("output", "Sorry, I could not find an answer.")
-            final_response = translate_back(final_response, original_lang)
-        elif "off-topic" in classification_lower:
-            final_response = "I am Agri-Bot, your farming assistant. I can only answer questions related to agriculture."
-        else:
-            # Handle agricultural questions
-            translated_query, original_lang = translate_to_english(query)
-            
-            rag_chain = models["rag_chain"]
-            rag_response_data = await rag_chain.ainvoke({
-                "input": translated_query,
-                "chat_history": langchain_chat_history
-            })
-            rag_response = rag_response_data.get("answer", "").strip()
-
-            fallback_phrases = ["don't know", "do not have enough information", "cannot answer"]
-            if not rag_response or any(phrase in rag_response.lower() for phrase in fallback_phrases):
-                agent = models["agent"]
-                agent_response = await agent.ainvoke({
-                    "input": translated_query,
-                    "chat_history": langchain_chat_history
-                })
-                final_response = agent_response.get("output", "Sorry, I could not find an answer.")
+        }),
+        priority=Priority.ROUTING,
+    )
+    return classification.lower()
+
+def _log_prompt_tokens(call: str, report):
+    """Logs the token report of one LLM call so prompt growth shows up per request."""
+    if report:
+        print(f"--- Prompt tokens ({call}): {report} ---")
+
+def _request_deadline() -> float:
+    """The agent's latency budget is counted from when the request arrives, not when the agent starts."""
+    return time.monotonic() + settings.AGENT_TIME_BUDGET
+
+async def _ask_agent(scheduler, translated_query, langchain_chat_history, deadline) -> str:
+    agent = models["agent"]
+    # Each Gemini request and search the agent makes is charged as it happens. The
+    # agent enforces its own deadline, so a timed-out turn is not retried from scratch.
+    agent_response = await scheduler.run(
+        lambda: agent.ainvoke({
+            "input": translated_query,
+            "chat_history": langchain_chat_history
+        }, budget=deadline - time.monotonic()),
+        retries=0,
+    )
+    _log_prompt_tokens("agent", agent_response.get("prompt_tokens"))
+    return agent_response.get("output", "Sorry, I could not find an answer.")
+
+async def _ask_rag(scheduler, translated_query, langchain_chat_history) -> str:
+    rag_chain = models["rag_chain"]
+    # The query embedding and each Gemini call are admitted one by one as they happen.
+    rag_response_data = await scheduler.run(
+        lambda: rag_chain.ainvoke({
+            "input": translated_query,
+            "chat_history": langchain_chat_history
+        }),
+    )
+    for call, report in (rag_response_data.get("prompt_tokens") or {}).items():
+        _log_prompt_tokens(f"rag {call}", report)
+    return rag_response_data.get("answer", "").strip()
+
+async def _stream_rag(scheduler, translated_query, langchain_chat_history):
+    """Yields answer tokens from the RAG chain; its requests are admitted at ANSWER priority as they happen."""
+    rag_chain = models["rag_chain"]
+    async with scheduler.slot():
+        async for chunk in rag_chain.astream({
+            "input": translated_query,
+            "chat_history": langchain_chat_history
+        }):
+            for call, report in (chunk.get("prompt_tokens") or {}).items():
+                _log_prompt_tokens(f"rag {call}", report)
+            if chunk.get("answer"):
+                yield chunk["answer"]
+
+async def _suggest(scheduler, query, final_response):
+    """Generates follow-up suggestions. They are the first thing to drop when Gemini is saturated."""
+    suggestion_chain = models["suggestion_chain"]
+    try:
+        suggestion_text = await scheduler.run(
+            lambda: suggestion_chain.ainvoke({"query": query, "response": final_response}),
+            priority=Priority.SUGGESTION,
+            retries=0,
+        )
+    except SchedulerRejected as e:
+        print(f"--- Skipping suggestions under load: {e} ---")
+        return []
+    return parse_suggestions(suggestion_text)
+
+async def _answer_events(scheduler, query, session_id, langchain_chat_history, classification_lower, deadline, stream):
+    """
+    The answer pipeline shared by /chat and /chat/stream, run after classification.
+    Yields {"type": "token"} events as the answer is produced, {"type": "reset"} if
+    streamed text is discarded in favour of the agent, and a final {"type": "done"}
+    event carrying the recorded response and suggestions. With stream=False the
+    RAG answer is fetched in one call (and retried on transient errors) instead
+    of being streamed token by token.
+    """
+    suggestions = []
+    final_response = _canned_reply(classification_lower)
+
+    if final_response is not None:
+        yield _event("token", text=final_response)
+    elif "capability_inquiry" in classification_lower:
+        translated_query, original_lang = await atranslate_to_english(query)
+        final_response = await _ask_agent(scheduler, translated_query, langchain_chat_history, deadline)
+        final_response = await atranslate_back(final_response, original_lang)
+        yield _event("token", text=final_response)
+    else:
+        # Handle agricultural questions
+        translated_query, original_lang = await atranslate_to_english(query)
+        precomputed = await _precomputed_answer(scheduler, translated_query, original_lang, langchain_chat_history)
+
+        if precomputed is not None:
+            final_response = await atranslate_back(precomputed["response"], original_lang)
+            suggestions = precomputed["suggestions"]
+            yield _event("token", text=final_response)
+        elif stream and original_lang == "en":
+            # Hold back the opening of the answer until it is clearly not a fallback reply.
+            rag_response = ""
+            streaming = False
+            async for token in _stream_rag(scheduler, translated_query, langchain_chat_history):
+                rag_response += token
+                if streaming:
+                    yield _event("token", text=token)
+                elif len(rag_response) >= FALLBACK_PROBE_CHARS and not is_fallback_answer(rag_response):
+                    streaming = True
+                    yield _event("token", text=rag_response)
+            rag_response = rag_response.strip()
+
+            if is_fallback_answer(rag_response):
+                if streaming:
+                    yield _event("reset")
+                final_response = await _ask_agent(scheduler, translated_query, langchain_chat_history, deadline)
+                yield _event("token", text=final_response)
             else:
                 final_response = rag_response
-            
-            final_response = translate_back(final_response, original_lang)
-            
+                if not streaming:
+                    yield _event("token", text=final_response)
             # Generate suggestions only for valid agricultural responses.
-            suggestion_chain = models["suggestion_chain"]
-            suggestion_text = await suggestion_chain.ainvoke({"query": query, "response": final_response})
-            suggestions = [s.strip() for s in suggestion_text.split(',') if s.strip()]
+            suggestions = await _suggest(scheduler, query, final_response)
+        else:
+            # Translated answers can only be sent once they are complete.
+            rag_response = await _ask_rag(scheduler, translated_query, langchain_chat_history)
+            if is_fallback_answer(rag_response):
+                final_response = await _ask_agent(scheduler, translated_query, langchain_chat_history, deadline)
+            else:
+                final_response = rag_response
+            final_response = await atranslate_back(final_response, original_lang)
+            yield _event("token", text=final_response)
+            suggestions = await _suggest(scheduler, query, final_response)
 
-        cleaned_response_lines = clean_and_split_for_ui(final_response)
-        full_response_string = "\n".join(cleaned_response_lines)
+    full_response_string = _record_turn(session_id, query, final_response)
+    yield _event("done", response=full_response_string, session_id=session_id, suggestions=suggestions)
 
-        chat_histories[session_id].append({"type": "human", "content": query})
-        chat_histories[session_id].append({"type": "ai", "content": full_response_string})
+async def _direct_events(query, session_id, direct):
+    full_response_string = _record_turn(session_id, query, direct["response"])
+    yield _event("token", text=direct["response"])
+    yield _event("done", response=full_response_string, session_id=session_id, suggestions=direct["suggestions"])
 
-        return {"response": full_response_string, "session_id": session_id, "suggestions": suggestions}
+async def _turn_events(scheduler, query, session_id, langchain_chat_history, deadline, stream):
+    """
+    Answers a turn from the price index or FAQ tier when possible, otherwise
+    classifies it and runs the answer pipeline. Classification happens before
+    the first event, so overload there is raised before a stream has started.
+    """
+    direct = _direct_answer(query)
+    if direct is not None:
+        return _direct_events(query, session_id, direct)
+    classification_lower = await _classify(scheduler, query, langchain_chat_history)
+    return _answer_events(scheduler, query, session_id, langchain_chat_history, classification_lower, deadline, stream)
 
+@app.post("/chat", summary="Get a response from Agri-Bot")
+async def chat_endpoint(request: ChatRequest):
+    """Processes a user's query and returns Agri-Bot's response."""
+    scheduler = get_scheduler()
+    deadline = _request_deadline()
+    try:
+        session_id = request.session_id
+        langchain_chat_history = _get_history(session_id)
+        events = await _turn_events(scheduler, request.query, session_id, langchain_chat_history, deadline, stream=False)
+        async for event in events:
+            if event["type"] == "done":
+                return {"response": event["response"], "session_id": session_id, "suggestions": event["suggestions"]}
+
+    except SchedulerRejected as e:
+        raise _rejection(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/chat/stream", summary="Stream a response from Agri-Bot")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Runs the same pipeline as /chat but streams newline-delimited JSON events:
+    {"type": "token", "text": ...} as the answer is generated, {"type": "reset"}
+    if streamed text is discarded in favour of the agent, then a final
+    {"type": "done", "response": ..., "suggestions": [...]} or {"type": "error", "detail": ...}.
+    """
+    scheduler = get_scheduler()
+    deadline = _request_deadline()
+    session_id = request.session_id
+    langchain_chat_history = _get_history(session_id)
+
+    # Overload during classification still maps to a 429/503 status.
+    try:
+        events = await _turn_events(scheduler, request.query, session_id, langchain_chat_history, deadline, stream=True)
+    except SchedulerRejected as e:
+        raise _rejection(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def lines():
+        try:
+            async for event in events:
+                yield json.dumps(event) + "\n"
+        except SchedulerRejected as e:
+            yield json.dumps(_event("error", status_code=e.status_code, detail=str(e), retry_after=math.ceil(e.retry_after))) + "\n"
+        except Exception as e:
+            yield json.dumps(_event("error", status_code=500, detail=str(e))) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,12 +1,9 @@
 import streamlit as st
 import asyncio
-from core.translation import translate_to_english, translate_back
+import uuid
 from core.memory import get_memory
-from agent.rag_agent import build_rag_chain
-from agent.conversational import get_conversational_agent
-from core.llm import load_llm
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from core.api_client import AgriBotClient
+from config.settings import settings
 
 # --- FIX FOR ASYNCIO EVENT LOOP ERROR ---
 try:
@@ -17,19 +14,26 @@ except RuntimeError:
 # -----------------------------------------
 
 # --- LAZY INITIALIZATION WITH CACHING ---
+# The model stack (Gemini, FAISS, pandas) is imported only in local mode, so
+# an APP_MODE=api front end does not load any of it.
 @st.cache_resource
 def get_rag_chain():
     """Builds and returns the RAG chain."""
+    from agent.rag_agent import build_rag_chain
     return build_rag_chain()
 
 @st.cache_resource
 def get_agent():
     """Builds and returns the conversational agent with tools."""
+    from agent.conversational import get_conversational_agent
     return get_conversational_agent()
 
 @st.cache_resource
 def get_classifier_chain():
     """Builds a chain to classify user queries."""
+    from core.llm import load_llm
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
     llm = load_llm()
     # --- THIS IS THE FIX ---
     # The classifier now recognizes a 'Conversational' category for simple words.
@@ -47,8 +51,14 @@ def get_classifier_chain():
     )
     return prompt | llm | StrOutputParser()
 
+@st.cache_resource
+def get_api_client():
+    """Returns a pooled HTTP client for the Agri-Bot API, shared by all sessions."""
+    return AgriBotClient()
+
 # --- RESILIENT STARTUP LOGIC ---
-if 'rag_enabled' not in st.session_state:
+# In API mode the chains live in the FastAPI service, so nothing is built here.
+if settings.APP_MODE == "local" and 'rag_enabled' not in st.session_state:
     try:
         get_rag_chain()
         st.session_state.rag_enabled = True
@@ -56,85 +66,136 @@ if 'rag_enabled' not in st.session_state:
         st.session_state.rag_enabled = False
         print(f"--- RAG Chain initialization failed: {e}. Bot will use agent-only mode. ---")
 
-def render_chat_ui():
-    """Renders the main chat interface for the Streamlit app."""
-    st.title("🌱 Agri-Bot")
-    st.subheader("Your Farming Assistant")
-
-    if "memory" not in st.session_state:
-        st.session_state.memory = get_memory()
-    memory = st.session_state.memory
+def render_remote_turn(prompt, memory):
+    """Sends the prompt to the API and renders the answer as tokens stream in."""
+    try:
+        st.chat_message("human").markdown(prompt)
+        with st.chat_message("ai"):
+            placeholder = st.empty()
+            placeholder.markdown("Thinking...")
+            streamed_text = ""
+            final_response = ""
+            for event in get_api_client().stream_chat(prompt, st.session_state.session_id):
+                if event["type"] == "token":
+                    streamed_text += event["text"]
+                    placeholder.markdown(streamed_text + "▌")
+                elif event["type"] == "reset":
+                    streamed_text = ""
+                    placeholder.markdown("Thinking...")
+                elif event["type"] == "done":
+                    final_response = event["response"]
+                    placeholder.markdown(final_response)
+
+        memory.add_user_message(prompt)
+        memory.add_ai_message(final_response or streamed_text)
 
-    if st.button("New Conversation"):
-        memory.clear()
-        st.success("Chat history cleared!")
         st.rerun()
 
-    for msg in memory.messages:
-        st.chat_message(msg.type).markdown(msg.content)
-
-    prompt = st.chat_input("Ask me anything about agriculture...")
-    if prompt:
-        with st.spinner("Thinking..."):
-            try:
-                chat_history = memory.messages
+    except Exception as e:
+        st.error(f"An error occurred during processing: {e}")
+
+def render_local_turn(prompt, memory):
+    """Answers the prompt with the chains built inside this Streamlit process."""
+    from core.translation import translate_to_english, translate_back
+    from core.price_index import answer_price_query
+    from agent.faq import answer_faq_query
+
+    with st.spinner("Thinking..."):
+        try:
+            chat_history = memory.messages
+            # Price lookups and known FAQs are answered without any LLM call.
+            direct_answer = answer_price_query(prompt)
+            if direct_answer is None:
+                faq_entry = answer_faq_query(prompt)
+                direct_answer = faq_entry["answer"] if faq_entry else None
+            classification = ""
+            if direct_answer is None:
                 classifier_chain = get_classifier_chain()
                 classification = classifier_chain.invoke({
                     "user_input": prompt,
                     "chat_history": chat_history
                 })
 
-                # --- THIS IS THE FIX ---
-                # Added logic to handle the new 'Conversational' category.
-                if "greeting" in classification.lower():
-                    if any(word in prompt.lower() for word in ['thank', 'thanks']):
-                        final_translated_response = "You're welcome! Is there anything else I can help you with regarding agriculture?"
-                    else:
-                        final_translated_response = "Hello! I am Agri-Advisor. How can I assist you with your farming questions today?"
-                elif "conversational" in classification.lower():
-                    final_translated_response = "Is there anything else I can help you with?"
-                elif "off-topic" in classification.lower():
-                    final_translated_response = "I am Agri-Bot, your farming assistant. I can only answer questions related to agriculture."
+            # --- THIS IS THE FIX ---
+            # Added logic to handle the new 'Conversational' category.
+            if direct_answer is not None:
+                final_translated_response = direct_answer
+            elif "greeting" in classification.lower():
+                if any(word in prompt.lower() for word in ['thank', 'thanks']):
+                    final_translated_response = "You're welcome! Is there anything else I can help you with regarding agriculture?"
                 else:
-                    # Handle agricultural questions
-                    translated_query, original_lang = translate_to_english(prompt)
-                    
-                    if st.session_state.rag_enabled:
-                        rag_chain = get_rag_chain()
-                        rag_response_data = rag_chain.invoke({
-                            "input": translated_query,
-                            "chat_history": chat_history
-                        })
-                        rag_response = rag_response_data.get("answer", "").strip()
-
-                        fallback_phrases = ["don't know", "do not have enough information", "cannot answer"]
-                        if not rag_response or any(phrase in rag_response.lower() for phrase in fallback_phrases):
-                            agent = get_agent()
-                            agent_response = agent.invoke({
-                                "input": translated_query,
-                                "chat_history": chat_history
-                            })
-                            final_response = agent_response.get("output", "Sorry, I could not find an answer.")
-                        else:
-                            final_response = rag_response
-                    else:
+                    final_translated_response = "Hello! I am Agri-Advisor. How can I assist you with your farming questions today?"
+            elif "conversational" in classification.lower():
+                final_translated_response = "Is there anything else I can help you with?"
+            elif "off-topic" in classification.lower():
+                final_translated_response = "I am Agri-Bot, your farming assistant. I can only answer questions related to agriculture."
+            else:
+                # Handle agricultural questions
+                translated_query, original_lang = translate_to_english(prompt)
+
+                if st.session_state.rag_enabled:
+                    rag_chain = get_rag_chain()
+                    rag_response_data = rag_chain.invoke({
+                        "input": translated_query,
+                        "chat_history": chat_history
+                    })
+                    rag_response = rag_response_data.get("answer", "").strip()
+
+                    fallback_phrases = ["don't know", "do not have enough information", "cannot answer"]
+                    if not rag_response or any(phrase in rag_response.lower() for phrase in fallback_phrases):
                         agent = get_agent()
                         agent_response = agent.invoke({
                             "input": translated_query,
                             "chat_history": chat_history
                         })
                         final_response = agent_response.get("output", "Sorry, I could not find an answer.")
+                    else:
+                        final_response = rag_response
+                else:
+                    agent = get_agent()
+                    agent_response = agent.invoke({
+                        "input": translated_query,
+                        "chat_history": chat_history
+                    })
+                    final_response = agent_response.get("output", "Sorry, I could not find an answer.")
+
+                final_translated_response = translate_back(final_response, original_lang)
+            # ---------------------
+
+            memory.add_user_message(prompt)
+            memory.add_ai_message(final_translated_response)
+
+            st.rerun()
+
+        except Exception as e:
+            st.error(f"An error occurred during processing: {e}")
+
+def render_chat_ui():
+    """Renders the main chat interface for the Streamlit app."""
+    st.title("🌱 Agri-Bot")
+    st.subheader("Your Farming Assistant")
+
+    if "memory" not in st.session_state:
+        st.session_state.memory = get_memory()
+    memory = st.session_state.memory
+
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = str(uuid.uuid4())
+
+    if st.button("New Conversation"):
+        memory.clear()
+        st.session_state.session_id = str(uuid.uuid4())
+        st.success("Chat history cleared!")
+        st.rerun()
 
-                    final_translated_response = translate_back(final_response, original_lang)
-                # ---------------------
-                
-                memory.add_user_message(prompt)
-                memory.add_ai_message(final_translated_response)
-                
-                st.rerun()
+    for msg in memory.messages:
+        st.chat_message(msg.type).markdown(msg.content)
 
-            except Exception as e:
-                st.error(f"An error occurred during processing: {e}")
+    prompt = st.chat_input("Ask me anything about agriculture...")
+    if prompt and settings.APP_MODE == "api":
+        render_remote_turn(prompt, memory)
+    elif prompt:
+        render_local_turn(prompt, memory)
 
 def main():
     """Main function to run the Streamlit app."""
@@ -12,4 +12,88 @@ class Settings:
     MODEL: str = "gemini-1.5-flash-latest"
     TEMPERATURE: float = 0.2
 
+    # --- Retrieval ---
+    # Tune these with `python -m agent.retrieval_eval`.
+    CHUNK_SIZE: int = 750
+    CHUNK_OVERLAP: int = 75
+    RETRIEVER_K: int = 3
+
+    # --- Prompts ---
+    # "full" sends the detailed prompts; "compact" sends short ones for lower latency and cost.
+    PROMPT_PROFILE: str = os.getenv("PROMPT_PROFILE", "full")
+    # Token budgets per profile: whole prompt, chat history, each tool observation,
+    # and the number of search results fetched per query.
+    PROMPT_BUDGETS: dict = {
+        "full": {"total": 8000, "history": 1500, "observation": 1500, "search_results": 10},
+        "compact": {"total": 3000, "history": 600, "observation": 600, "search_results": 3},
+    }
+
+    # --- Outbound call scheduling ---
+    # Each provider gets a token bucket (requests per minute + burst), a cap on
+    # concurrent calls and a bounded wait queue. Defaults follow the free tier.
+    # Gemini requests are charged one by one through the chat model's rate
+    # limiter, which meters requests per minute but cannot hold a slot, so
+    # Gemini has no concurrency cap. Embeddings, translations and searches are
+    # admitted per request and hold a slot while it runs.
+    PROVIDER_LIMITS: dict = {
+        "gemini": {
+            "rpm": int(os.getenv("GEMINI_RPM", "15")),
+            "burst": int(os.getenv("GEMINI_BURST", "5")),
+            "max_queue": int(os.getenv("GEMINI_MAX_QUEUE", "32")),
+        },
+        "embedding": {
+            "rpm": int(os.getenv("EMBEDDING_RPM", "100")),
+            "burst": 10,
+            "concurrency": 4,
+            "max_queue": 32,
+        },
+        "translate": {
+            "rpm": int(os.getenv("TRANSLATE_RPM", "60")),
+            "burst": 10,
+            "concurrency": 4,
+            "max_queue": 64,
+        },
+        "search": {
+            "rpm": int(os.getenv("TAVILY_RPM", "30")),
+            "burst": 5,
+            "concurrency": 4,
+            "max_queue": 32,
+        },
+    }
+    # Longest time (seconds) a call may wait in the queue, per priority.
+    SCHEDULER_MAX_WAIT: dict = {"answer": 20.0, "routing": 10.0, "suggestion": 2.0}
+    SCHEDULER_MAX_RETRIES: int = 3
+    SCHEDULER_BACKOFF_BASE: float = 1.0
+    SCHEDULER_BACKOFF_CAP: float = 16.0
+    # Retries inside the Google client itself; the scheduler owns backoff.
+    LLM_CLIENT_RETRIES: int = 1
+
+    # --- Conversational agent ---
+    # "react" keeps the text ReAct loop; "tool_calling" lets the model issue
+    # independent searches (e.g. weather and crop needs) in a single step.
+    AGENT_MODE: str = os.getenv("AGENT_MODE", "react")
+    AGENT_MAX_ITERATIONS: int = 8
+    # Total seconds per request that ends in the agent (counted by the API from
+    # when the request arrives, so queueing and a preceding RAG call use it up),
+    # and the slice of it kept back for writing a final answer from whatever
+    # the tools have found so far.
+    AGENT_TIME_BUDGET: float = float(os.getenv("AGENT_TIME_BUDGET", "25"))
+    AGENT_ANSWER_RESERVE: float = 5.0
+    AGENT_VERBOSE: bool = os.getenv("AGENT_VERBOSE", "false").lower() == "true"
+
+    # --- Precomputed FAQ answers ---
+    FAQ_QUESTIONS_PATH: str = "config/faq_questions.txt"
+    # Minimum cosine similarity between a query and an FAQ question to reuse its answer.
+    FAQ_MATCH_THRESHOLD: float = float(os.getenv("FAQ_MATCH_THRESHOLD", "0.92"))
+    # Regenerate new or stale FAQ entries in the background when the API starts.
+    FAQ_AUTO_REFRESH: bool = os.getenv("FAQ_AUTO_REFRESH", "true").lower() == "true"
+
+    # --- Streamlit front end ---
+    # "local" builds the chains inside the Streamlit process (single-user demos);
+    # "api" makes app.py a thin client of the FastAPI service at API_URL.
+    APP_MODE: str = os.getenv("APP_MODE", "local")
+    API_URL: str = os.getenv("API_URL", "http://localhost:10000")
+    API_TIMEOUT: float = float(os.getenv("API_TIMEOUT", "90"))
+    API_MAX_CONNECTIONS: int = 20
+
 settings = Settings()
\ No newline at end of file
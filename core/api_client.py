@@ -0,0 +1,61 @@
+import json
+import httpx
+from config.settings import settings
+
+
+class AgriBotAPIError(Exception):
+    """Raised when the Agri-Bot API rejects a request or reports a failure mid-stream."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AgriBotClient:
+    """
+    Thin client for the Agri-Bot FastAPI service. A single pooled httpx.Client
+    is reused across requests so connections stay warm between chat turns.
+    """
+
+    def __init__(self, base_url: str = None, timeout: float = None, transport: httpx.BaseTransport = None):
+        self._client = httpx.Client(
+            transport=transport,
+            base_url=base_url or settings.API_URL,
+            timeout=httpx.Timeout(timeout or settings.API_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=settings.API_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.API_MAX_CONNECTIONS,
+            ),
+        )
+
+    def chat(self, query: str, session_id: str) -> dict:
+        """Sends a query to /chat and returns the full response payload."""
+        response = self._client.post("/chat", json={"query": query, "session_id": session_id})
+        if response.status_code >= 400:
+            raise AgriBotAPIError(response.status_code, _detail(response))
+        return response.json()
+
+    def stream_chat(self, query: str, session_id: str):
+        """Sends a query to /chat/stream and yields each event dict as it arrives."""
+        with self._client.stream("POST", "/chat/stream", json={"query": query, "session_id": session_id}) as response:
+            if response.status_code >= 400:
+                response.read()
+                raise AgriBotAPIError(response.status_code, _detail(response))
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get("type") == "error":
+                    raise AgriBotAPIError(event.get("status_code", 500), event.get("detail", ""))
+                yield event
+
+    def close(self):
+        self._client.close()
+
+
+def _detail(response) -> str:
+    try:
+        return response.json().get("detail", response.text)
+    except ValueError:
+        return response.text
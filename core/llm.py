@@ -1,11 +1,14 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from config.settings import settings
+from core.scheduler import get_scheduler
 
 def load_llm():
-    """Load the Google Gemini LLM"""
+    """Load the Google Gemini LLM. Every request it makes is charged to the scheduler's gemini bucket."""
     # The deprecated 'convert_system_message_to_human' parameter has been removed.
     return ChatGoogleGenerativeAI(
         model=settings.MODEL,
         temperature=settings.TEMPERATURE,
         google_api_key=settings.GOOGLE_API_KEY,
+        max_retries=settings.LLM_CLIENT_RETRIES,
+        rate_limiter=get_scheduler().rate_limiter("gemini"),
     )
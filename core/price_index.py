@@ -0,0 +1,360 @@
+import datetime
+import os
+import pickle
+import re
+import pandas as pd
+from core.rag_loder import load_price_tables, PRICE_TABLE_EXTENSIONS
+
+# Define the path for the local price index
+PRICE_INDEX_PATH = "core/priceindex/prices.pkl"
+
+PRICE_KEYWORDS = ("price", "prices", "bhav", "bhaav", "mandi", "modal", "selling for")
+
+# 'rate' is common in agronomy ('seed rate of wheat'), so it only counts as a
+# price keyword right next to a commodity or market: 'onion rate', 'rates in Lasalgaon'.
+ADJACENT_PRICE_KEYWORDS = ("rate", "rates")
+
+# Questions containing these are about farming costs or quantities, not mandi prices.
+NON_PRICE_PHRASES = (
+    "seed rate", "sowing rate", "seeding rate", "application rate", "dose rate", "spray rate",
+    "fertilizer rate", "growth rate", "interest rate", "premium rate", "subsidy rate",
+    "cost of cultivation", "cost of production", "support price",
+)
+
+# Words that make a 'price' question about farm inputs or practices ('price of
+# onion seeds', 'fertilizer price for wheat', 'which variety fetches a better price').
+INPUT_PRACTICE_WORDS = re.compile(
+    r"\b(?:seeds?|seedlings?|saplings?|fertili[sz]ers?|urea|dap|manure|compost|pests?|pesticides?|"
+    r"insecticides?|herbicides?|fungicides?|weedicides?|sprays?|diseases?|varieties|variety|hybrids?|"
+    r"tractors?|machinery|equipment|labou?r|wages?|irrigation|control)\b"
+)
+
+# Words that ask where prices are heading; the index only holds reported prices.
+FUTURE_WORDS = re.compile(
+    r"\b(?:will|forecast|predict|prediction|expected|expect|outlook|future|tomorrow|next (?:week|month|year|season)|"
+    r"rise|rising|fall|falling|increase|decrease|go (?:up|down))\b"
+)
+
+# Words that may follow 'in', 'at' or 'from' in a price question without naming a place.
+PLACE_FILLERS = {
+    "a", "an", "the", "this", "that", "my", "our", "your", "all", "each", "every", "other", "which", "what",
+    "india", "indian", "market", "markets", "mandi", "mandis", "apmc", "local", "nearby", "wholesale", "retail",
+    "rupees", "rs", "inr", "quintal", "quintals", "kg", "kilo", "ton", "tonne", "tonnes", "per", "total",
+    "today", "yesterday", "last", "past", "recent", "current", "season", "kharif", "rabi", "hindi", "english",
+}
+
+MONTHS = ("january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december")
+
+# An explicit date or year, checked when no period could be read from the question.
+DATE_LIKE = re.compile(r"\b(?:\d{1,4}[/-]\d{1,2}[/-]\d{1,4}|(?:19|20)\d{2})\b")
+
+# Local names mapped to the commodity names used in mandi reports.
+COMMODITY_ALIASES = {
+    "pyaz": "onion",
+    "pyaaz": "onion",
+    "kanda": "onion",
+    "tamatar": "tomato",
+    "aloo": "potato",
+    "alu": "potato",
+    "gehun": "wheat",
+    "gehu": "wheat",
+    "dhan": "paddy",
+    "chana": "bengal gram",
+    "kapas": "cotton",
+    "soyabean": "soybean",
+}
+
+MAX_MARKETS_LISTED = 5
+
+
+def _key(name):
+    """Normalizes a commodity, market or state name for matching: 'Paddy(Dhan)(Common)' -> 'paddy'."""
+    name = re.sub(r"\(.*?\)", " ", str(name)).lower()
+    name = re.sub(r"[^a-z0-9 ]", " ", name)
+    return re.sub(r"\s+", " ", name).strip()
+
+
+def _find_term(text, vocabulary):
+    """Returns the longest vocabulary entry that appears in the text as whole words."""
+    for term in vocabulary:
+        if term and re.search(rf"\b{re.escape(term)}s?\b", text):
+            return term
+    return None
+
+
+def _is_next_to(text, keywords, term):
+    """True if one of the keywords sits next to the term: 'onion rate', 'rate of onion', 'rates in lasalgaon'."""
+    term = rf"{re.escape(term)}s?"
+    for keyword in keywords:
+        if re.search(rf"\b{term} {keyword}\b|\b{keyword} (?:of |for |in |at )?(?:the )?{term}\b", text):
+            return True
+    return False
+
+
+def _parse_window(text, today):
+    """Returns (start, end, label) for the date range mentioned in the text, or None."""
+    match = re.search(r"\b(?:last|past) (\d+) days?\b", text)
+    if match:
+        days = int(match.group(1))
+        return today - datetime.timedelta(days=days - 1), today, f"the last {days} days"
+    if re.search(r"\b(?:last|past) week\b", text):
+        return today - datetime.timedelta(days=6), today, "the last week"
+    if "this week" in text:
+        return today - datetime.timedelta(days=today.weekday()), today, "this week"
+    if re.search(r"\b(?:last|past) month\b", text):
+        return today - datetime.timedelta(days=29), today, "the last month"
+    if "yesterday" in text:
+        day = today - datetime.timedelta(days=1)
+        return day, day, "yesterday"
+    if "today" in text:
+        return today, today, "today"
+
+    match = re.search(r"\b(\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/-]\d{1,2}[/-]\d{4})\b", text)
+    if match:
+        raw = match.group(1)
+        day = pd.to_datetime(raw, dayfirst=not raw[:4].isdigit(), errors="coerce")
+        if not pd.isna(day):
+            day = day.date()
+            return day, day, _fmt_date(day)
+        return None
+
+    # 'may' is only a month when it is clearly used as one: 'in may', 'may 2024'.
+    match = re.search(rf"\b(in |during )?({'|'.join(MONTHS)})(?: (\d{{4}}))?\b", text)
+    if match and (match.group(2) != "may" or match.group(1) or match.group(3)):
+        month = MONTHS.index(match.group(2)) + 1
+        if match.group(3):
+            year = int(match.group(3))
+        else:
+            year = today.year if month <= today.month else today.year - 1
+        start = datetime.date(year, month, 1)
+        end = (start + datetime.timedelta(days=31)).replace(day=1) - datetime.timedelta(days=1)
+        return start, end, start.strftime("%B %Y")
+
+    match = re.search(r"\b((?:19|20)\d{2})\b", text)
+    if match:
+        year = int(match.group(1))
+        return datetime.date(year, 1, 1), datetime.date(year, 12, 31), str(year)
+    return None
+
+
+def _fmt_date(day):
+    return day.strftime("%d %b %Y")
+
+
+def _fmt_price(value):
+    return f"₹{value:,.0f}"
+
+
+class PriceIndex:
+    """
+    Columnar store of mandi prices with a commodity -> row positions index.
+    Rows are sorted by commodity, market and date, so every lookup only scans
+    the slice for one commodity.
+    """
+
+    def __init__(self, prices):
+        prices = prices.copy()
+        prices["commodity_key"] = prices["commodity"].map(_key)
+        prices["market_key"] = prices["market"].map(_key)
+        prices["state_key"] = prices["state"].map(_key)
+        prices = prices.sort_values(["commodity_key", "market_key", "date"]).reset_index(drop=True)
+        for column in ["commodity", "market", "state", "district", "variety",
+                       "commodity_key", "market_key", "state_key"]:
+            prices[column] = prices[column].astype("category")
+
+        self.prices = prices
+        self._by_commodity = {key: rows for key, rows in prices.groupby("commodity_key", observed=True).indices.items()}
+        # Longest names first so 'bengal gram' wins over 'gram'.
+        self.commodities = sorted(self._by_commodity, key=len, reverse=True)
+        self.markets = sorted(set(prices["market_key"]) - {""}, key=len, reverse=True)
+        self.states = sorted(set(prices["state_key"]) - {""}, key=len, reverse=True)
+
+    @property
+    def empty(self):
+        return self.prices.empty
+
+    def lookup(self, commodity, market=None, state=None, start=None, end=None):
+        """Returns the price rows for a commodity key, optionally narrowed by market, state and date range."""
+        rows = self._by_commodity.get(commodity)
+        if rows is None:
+            return self.prices.iloc[0:0]
+        subset = self.prices.iloc[rows]
+        if market:
+            subset = subset[subset["market_key"] == market]
+        if state:
+            subset = subset[subset["state_key"] == state]
+        if start:
+            subset = subset[subset["date"] >= pd.Timestamp(start)]
+        if end:
+            subset = subset[subset["date"] <= pd.Timestamp(end)]
+        return subset
+
+    def parse(self, text, today=None):
+        """
+        Recognizes a structured price question such as 'onion price in Lasalgaon last week'.
+        Returns a dict with commodity, market, state and date window keys, or None.
+        """
+        raw = text
+        text = " " + _key(text) + " "
+        has_keyword = any(f" {keyword} " in text for keyword in PRICE_KEYWORDS)
+        if not has_keyword and not any(f" {keyword} " in text for keyword in ADJACENT_PRICE_KEYWORDS):
+            return None
+        if any(f" {phrase} " in text for phrase in NON_PRICE_PHRASES):
+            return None
+
+        for alias, name in COMMODITY_ALIASES.items():
+            if name in self._by_commodity:
+                text = re.sub(rf"\b{alias}\b", name, text)
+        commodity = _find_term(text, self.commodities)
+        if commodity is None:
+            return None
+        market = _find_term(text, self.markets)
+        if not has_keyword and not any(
+            term and _is_next_to(text, ADJACENT_PRICE_KEYWORDS, term) for term in (commodity, market)
+        ):
+            return None
+
+        if INPUT_PRACTICE_WORDS.search(text) or FUTURE_WORDS.search(text):
+            return None
+        # A place the index doesn't know ('onion price in Pune') must not widen
+        # the lookup to every market, so the question falls through instead.
+        if self._unresolved_place(text):
+            return None
+
+        # Dates are read from the raw text, since normalization strips '/' and '-'.
+        window = _parse_window(raw.lower(), today or datetime.date.today())
+        if window is None and DATE_LIKE.search(raw):
+            return None
+        return {
+            "commodity": commodity,
+            "market": market,
+            "state": _find_term(text, self.states),
+            "start": window[0] if window else None,
+            "end": window[1] if window else None,
+            "period": window[2] if window else None,
+        }
+
+    def _unresolved_place(self, text):
+        """Returns the word after 'in', 'at' or 'from' if it names no known market, state or commodity."""
+        known = self.markets + self.states + self.commodities
+        for match in re.finditer(r"\b(?:in|at|from) ([a-z]+)\b", text):
+            word = match.group(1)
+            if word in PLACE_FILLERS or word in MONTHS:
+                continue
+            rest = text[match.start(1):]
+            if not any(re.match(rf"{re.escape(term)}s?\b", rest) for term in known):
+                return word
+        return None
+
+    def answer(self, text, today=None):
+        """Answers a structured price question straight from the index, or returns None if it isn't one."""
+        spec = self.parse(text, today=today)
+        if spec is None:
+            return None
+
+        place = dict(commodity=spec["commodity"], market=spec["market"], state=spec["state"])
+        rows = self.lookup(**place, start=spec["start"], end=spec["end"])
+        note = ""
+        if rows.empty and spec["period"]:
+            rows = self.lookup(**place)
+            note = f"No prices were reported for {spec['period']}. These are the most recent available.\n"
+        if rows.empty:
+            return None
+
+        commodity_name = str(rows["commodity"].iloc[-1])
+        if spec["market"]:
+            return note + _format_market_answer(commodity_name, rows, spec["period"] if not note else None)
+        return note + _format_multi_market_answer(commodity_name, rows, spec["period"] if not note else None)
+
+
+def _format_market_answer(commodity_name, rows, period):
+    latest = rows.iloc[-1]
+    where = str(latest["market"])
+    if latest["state"]:
+        where += f", {latest['state']}"
+    first_day, last_day = rows["date"].iloc[0].date(), latest["date"].date()
+    span = _fmt_date(last_day) if first_day == last_day else f"{_fmt_date(first_day)} to {_fmt_date(last_day)}"
+
+    lines = [f"{commodity_name} prices at {where} ({period or span}):"]
+    if len(rows) > 1:
+        lines.append(
+            f"- Average modal price: {_fmt_price(rows['modal_price'].mean())} per quintal "
+            f"(range {_fmt_price(rows['min_price'].min())} to {_fmt_price(rows['max_price'].max())}) "
+            f"from {len(rows)} reports."
+        )
+    lines.append(
+        f"- Latest ({_fmt_date(last_day)}): modal {_fmt_price(latest['modal_price'])}, "
+        f"min {_fmt_price(latest['min_price'])}, max {_fmt_price(latest['max_price'])} per quintal."
+    )
+    lines.append("Prices are as reported by the mandi, in rupees per quintal.")
+    return "\n".join(lines)
+
+
+def _format_multi_market_answer(commodity_name, rows, period):
+    latest = rows.sort_values("date").groupby("market_key", observed=True).tail(1)
+    latest = latest.sort_values("date", ascending=False)
+
+    lines = [f"Latest {commodity_name} prices by market" + (f" ({period}):" if period else ":")]
+    for _, row in latest.head(MAX_MARKETS_LISTED).iterrows():
+        where = str(row["market"]) + (f", {row['state']}" if row["state"] else "")
+        lines.append(f"- {where}: modal {_fmt_price(row['modal_price'])} per quintal ({_fmt_date(row['date'].date())})")
+    if len(latest) > MAX_MARKETS_LISTED:
+        lines.append(f"Showing {MAX_MARKETS_LISTED} of {len(latest)} markets. Name a mandi for its full price history.")
+    lines.append("Prices are as reported by the mandi, in rupees per quintal.")
+    return "\n".join(lines)
+
+
+def _source_signature(doc_folder):
+    if not os.path.exists(doc_folder):
+        return []
+    return [
+        (file, os.path.getmtime(os.path.join(doc_folder, file)), os.path.getsize(os.path.join(doc_folder, file)))
+        for file in sorted(os.listdir(doc_folder))
+        if file.endswith(PRICE_TABLE_EXTENSIONS)
+    ]
+
+
+def load_price_index(doc_folder="document"):
+    """
+    Loads the price index from PRICE_INDEX_PATH, rebuilding it from the CSV/XLSX
+    files in doc_folder if any of them were added, removed or modified.
+    """
+    signature = _source_signature(doc_folder)
+
+    if os.path.exists(PRICE_INDEX_PATH):
+        with open(PRICE_INDEX_PATH, "rb") as f:
+            saved = pickle.load(f)
+        if saved["signature"] == signature:
+            print("Loading existing price index from local path.")
+            return PriceIndex(saved["prices"])
+
+    print("Price index missing or stale. Building a new one...")
+    prices = load_price_tables(doc_folder)
+    os.makedirs(os.path.dirname(PRICE_INDEX_PATH), exist_ok=True)
+    with open(PRICE_INDEX_PATH, "wb") as f:
+        pickle.dump({"signature": signature, "prices": prices}, f)
+    return PriceIndex(prices)
+
+
+_price_index = None
+
+
+def get_price_index():
+    """Returns the process-wide price index, loading it on first use."""
+    global _price_index
+    if _price_index is None:
+        _price_index = load_price_index()
+    return _price_index
+
+
+def answer_price_query(text):
+    """Answers a structured mandi price question directly, or returns None so the caller falls through."""
+    try:
+        index = get_price_index()
+    except Exception as e:
+        print(f"Price index unavailable: {e}")
+        return None
+    if index.empty:
+        return None
+    return index.answer(text)
@@ -0,0 +1,107 @@
+import json
+from langchain_core.documents import Document
+from config.settings import settings
+
+# Gemini averages roughly four characters of English per token. An estimate is
+# enough for budgeting and avoids a count_tokens API call on every request.
+CHARS_PER_TOKEN = 4
+
+TRIMMED_MARKER = " [...]"
+
+
+def count_tokens(text) -> int:
+    """Estimates the token count of a string, a message or a list of messages."""
+    if text is None:
+        return 0
+    if isinstance(text, (list, tuple)):
+        return sum(count_tokens(item) for item in text)
+    if hasattr(text, "content"):
+        text = text.content
+    if not isinstance(text, str):
+        text = json.dumps(text, ensure_ascii=False, default=str)
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max(max_tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max(max_chars - len(TRIMMED_MARKER), 0)] + TRIMMED_MARKER
+
+
+class PromptBudget:
+    """
+    Measures prompt components (system, history, retrieved context, tool
+    observations) and trims them to fit a total token budget.
+
+    The system prompt and the user's input are never trimmed. Retrieved
+    documents are dropped lowest-ranked first, history oldest-first, and tool
+    observations are capped individually and then trimmed oldest-first.
+    """
+
+    def __init__(self, system_prompt: str, profile: str = None):
+        limits = settings.PROMPT_BUDGETS[profile or settings.PROMPT_PROFILE]
+        self.total = limits["total"]
+        self.history_tokens = limits["history"]
+        self.observation_tokens = limits["observation"]
+        # The system prompt is static, so it is measured once when the chain is built.
+        self.system_tokens = count_tokens(system_prompt)
+
+    def fit_history(self, messages, reserved: int = 0):
+        """Keeps the most recent messages that fit in the history allowance."""
+        allowance = min(self.history_tokens, self.total - self.system_tokens - reserved)
+        kept = []
+        for message in reversed(messages or []):
+            tokens = count_tokens(message)
+            if tokens > allowance:
+                break
+            kept.append(message)
+            allowance -= tokens
+        return list(reversed(kept))
+
+    def fit_documents(self, docs, reserved: int = 0):
+        """
+        Keeps retrieved documents in rank order until the budget is spent. The
+        top-ranked document is truncated rather than dropped if it alone is too long.
+        """
+        allowance = self.total - self.system_tokens - reserved
+        kept = []
+        for doc in docs:
+            tokens = count_tokens(doc.page_content)
+            if tokens <= allowance:
+                kept.append(doc)
+                allowance -= tokens
+            elif not kept and allowance > 0:
+                kept.append(Document(page_content=truncate_to_tokens(doc.page_content, allowance), metadata=doc.metadata))
+                break
+            else:
+                break
+        return kept
+
+    def fit_observations(self, steps, reserved: int = 0):
+        """
+        Caps each tool observation, then trims the oldest ones until the agent
+        scratchpad fits. Returns (action, observation) pairs with string observations.
+        """
+        allowance = self.total - self.system_tokens - self.history_tokens - reserved
+        fitted = []
+        for action, observation in reversed(steps):
+            if not isinstance(observation, str):
+                observation = json.dumps(observation, ensure_ascii=False, default=str)
+            limit = min(self.observation_tokens, max(allowance, 0))
+            observation = truncate_to_tokens(observation, limit) if limit else "[Observation omitted to fit the prompt budget.]"
+            allowance -= count_tokens(observation)
+            fitted.append((action, observation))
+        return list(reversed(fitted))
+
+    def report(self, **components) -> dict:
+        """
+        Token counts per component plus the system prompt and the total. List
+        components (messages, documents, observations) also get an item count
+        under '<name>_items'.
+        """
+        counts = {"system": self.system_tokens}
+        counts.update({name: count_tokens(value) for name, value in components.items()})
+        counts["total"] = sum(counts.values())
+        counts.update({f"{name}_items": len(value) for name, value in components.items() if isinstance(value, (list, tuple))})
+        return counts
@@ -1,15 +1,129 @@
 # In rag_loder.py
 
 import os
+import re
 import pandas as pd
 from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader, UnstructuredWordDocumentLoader
+from config.settings import settings
 
-def load_documents(doc_folder="document"):
+DOCUMENT_EXTENSIONS = (".pdf", ".docx")
+PRICE_TABLE_EXTENSIONS = (".csv", ".xlsx")
+PRICE_COLUMNS = ["commodity", "market", "state", "district", "variety", "date", "min_price", "max_price", "modal_price"]
+
+# Header spellings seen in Agmarknet / data.gov.in mandi exports, after normalization.
+PRICE_COLUMN_ALIASES = {
+    "commodity": "commodity",
+    "commodity name": "commodity",
+    "market": "market",
+    "market name": "market",
+    "mandi": "market",
+    "mandi name": "market",
+    "state": "state",
+    "state name": "state",
+    "district": "district",
+    "district name": "district",
+    "variety": "variety",
+    "date": "date",
+    "arrival date": "date",
+    "price date": "date",
+    "reported date": "date",
+    "min price": "min_price",
+    "minimum price": "min_price",
+    "max price": "max_price",
+    "maximum price": "max_price",
+    "modal price": "modal_price",
+}
+
+def _normalize_header(name):
+    name = str(name).lower().replace("_x0020_", " ").replace("_", " ")
+    name = re.sub(r"\(.*?\)", "", name)
+    return re.sub(r"\s+", " ", name).strip()
+
+def _normalize_price_frame(frame):
+    """
+    Maps a raw price sheet onto PRICE_COLUMNS. Returns None if the sheet lacks
+    the commodity, market, date and modal price columns needed for lookups.
+    """
+    frame = frame.rename(columns=lambda c: PRICE_COLUMN_ALIASES.get(_normalize_header(c), c))
+    frame = frame.loc[:, ~frame.columns.duplicated()]
+    if not {"commodity", "market", "date", "modal_price"}.issubset(frame.columns):
+        return None
+
+    for column in ["state", "district", "variety"]:
+        if column not in frame.columns:
+            frame[column] = ""
+    for column in ["min_price", "max_price"]:
+        if column not in frame.columns:
+            frame[column] = frame["modal_price"]
+
+    frame = frame[PRICE_COLUMNS].copy()
+    for column in ["commodity", "market", "state", "district", "variety"]:
+        frame[column] = frame[column].fillna("").astype(str).str.strip()
+    for column in ["min_price", "max_price", "modal_price"]:
+        frame[column] = pd.to_numeric(frame[column].astype(str).str.replace(",", ""), errors="coerce")
+    frame["date"] = pd.to_datetime(frame["date"], dayfirst=True, errors="coerce")
+    return frame.dropna(subset=["date", "modal_price"])
+
+def load_price_tables(doc_folder="document"):
+    """
+    Loads CSV/XLSX mandi price tables from the specified folder into a single
+    DataFrame with the PRICE_COLUMNS schema. Sheets that are not price tables are skipped.
+    """
+    frames = []
+    print("\n" + "="*50)
+    print("📊 --- Starting Price Table Loading Process --- 📊")
+
+    if not os.path.exists(doc_folder):
+        print(f"🛑 ERROR: The directory '{doc_folder}' was not found.")
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+
+    for file in sorted(os.listdir(doc_folder)):
+        if not file.endswith(PRICE_TABLE_EXTENSIONS):
+            continue
+        path = os.path.join(doc_folder, file)
+
+        try:
+            if file.endswith(".csv"):
+                sheets = {"": pd.read_csv(path)}
+            else:
+                sheets = pd.read_excel(path, sheet_name=None)
+
+            for sheet_name, sheet in sheets.items():
+                frame = _normalize_price_frame(sheet)
+                label = f"{file}:{sheet_name}" if sheet_name else file
+                if frame is None or frame.empty:
+                    print(f"⚠️ Warning: {label} has no usable price rows. Skipping.")
+                    continue
+                frames.append(frame)
+                print(f"✅ Loaded {len(frame)} price rows from: {label}")
+
+        except Exception as e:
+            print(f"❌ Error processing file {file}: {e}. Skipping.")
+
+    if not frames:
+        print("🟡 --- Price Table Loading Finished: no price tables found. ---")
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+
+    prices = pd.concat(frames, ignore_index=True)
+    print(f"✅ Total price rows loaded: {len(prices)}")
+    print("="*50 + "\n")
+    return prices
+
+def split_documents(docs, chunk_size=None, chunk_overlap=None):
+    """Splits loaded documents into chunks, using the settings' chunking parameters by default."""
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size or settings.CHUNK_SIZE,
+        chunk_overlap=chunk_overlap if chunk_overlap is not None else settings.CHUNK_OVERLAP,
+    )
+    return text_splitter.split_documents(docs)
+
+def load_documents(doc_folder="document", split=True):
     """
     Loads and cleans documents from the specified folder, supporting PDF and DOCX formats.
     This version includes detailed logging to verify which documents are loaded.
+    With split=False the cleaned pages are returned unsplit, for callers that chunk them themselves.
     """
     docs = []
     print("\n" + "="*50) # <-- ADDED FOR VISIBILITY
@@ -41,6 +155,9 @@ def load_documents(doc_folder="document"):
                 loader = UnstructuredWordDocumentLoader(path)
                 loaded_docs = loader.load()
 
+            elif file.endswith(PRICE_TABLE_EXTENSIONS):
+                print(f"📊 {file} is a price table; it is served from the price index, not the vector store.")
+
             clean_docs_from_file = [doc for doc in loaded_docs if doc.page_content and doc.page_content.strip()]
             
             if clean_docs_from_file:
@@ -57,10 +174,12 @@ def load_documents(doc_folder="document"):
          print("🛑 --- Document Loading Finished: No processable documents were loaded. ---")
          return []
 
+    if not split:
+        return docs
+
     print("-" * 50) # <-- ADDED FOR VISIBILITY
     print("Splitting documents into smaller chunks...")
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=750, chunk_overlap=75)
-    split_docs = text_splitter.split_documents(docs)
+    split_docs = split_documents(docs)
     
     # --- NEW: Final summary print ---
     print("\n" + "="*50)
@@ -0,0 +1,389 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import random
+import time
+from enum import IntEnum
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from config.settings import settings
+
+
+class Priority(IntEnum):
+    """Scheduling priority for outbound calls. Lower values are served first."""
+    ANSWER = 0
+    ROUTING = 1
+    SUGGESTION = 2
+
+
+# Priority of the pipeline currently running, so per-request limiters deep inside
+# a chain (the chat model's rate limiter, wrapped tools) queue at the right level.
+_current_priority = contextvars.ContextVar("scheduler_priority", default=Priority.ANSWER)
+# Providers charged per request during the current LLMScheduler.run(), so an
+# upstream quota error can drain their buckets too.
+_metered = contextvars.ContextVar("scheduler_metered", default=None)
+
+
+def current_priority() -> Priority:
+    """Priority of the scheduled pipeline this code is running in (ANSWER outside one)."""
+    return _current_priority.get()
+
+
+class SchedulerRejected(Exception):
+    """Raised when a call is refused instead of queued, so callers can fail fast."""
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(SchedulerRejected):
+    """The provider's wait queue is full, or the upstream service is unavailable."""
+    status_code = 503
+
+
+class QuotaExhaustedError(SchedulerRejected):
+    """The provider's rate limit or quota was hit and will not free up in time."""
+    status_code = 429
+
+
+_QUOTA_MARKERS = ("429", "resourceexhausted", "resource exhausted", "quota", "rate limit")
+_TRANSIENT_MARKERS = ("503", "unavailable", "deadline exceeded", "timed out", "timeout", "connection reset")
+
+
+def classify_error(exc: Exception):
+    """
+    Returns 'quota' for upstream rate-limit errors, 'transient' for errors worth
+    retrying, or None for everything else.
+    """
+    text = f"{type(exc).__name__} {exc}".lower()
+    if any(marker in text for marker in _QUOTA_MARKERS):
+        return "quota"
+    if any(marker in text for marker in _TRANSIENT_MARKERS):
+        return "transient"
+    return None
+
+
+class TokenBucket:
+    """A token bucket refilled continuously at `rpm` tokens per minute."""
+
+    def __init__(self, rpm: int, burst: int):
+        self.rate = rpm / 60.0
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, cost: float = 1) -> bool:
+        self._refill()
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def wait_time(self, cost: float = 1) -> float:
+        """Seconds until `cost` tokens will be available."""
+        self._refill()
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def drain(self):
+        """Empties the bucket after an upstream quota error so queued calls back off too."""
+        self._refill()
+        self.tokens = 0.0
+
+
+class ProviderLimiter:
+    """
+    Admission control for one provider: a token bucket, a concurrency cap and a
+    bounded priority queue. Waiters are woken strictly in priority order.
+
+    A waiter either holds a concurrency slot until release(), or (hold=False)
+    only takes rate tokens. The latter is for per-request limiters, such as a
+    chat model's rate_limiter, that are never told when the request finishes.
+    Providers only used that way have no concurrency cap (concurrency=None).
+    """
+
+    def __init__(self, name: str, rpm: int, burst: int, max_queue: int, concurrency: int = None):
+        self.name = name
+        self.bucket = TokenBucket(rpm, burst)
+        self.concurrency = concurrency if concurrency is not None else float("inf")
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters = []  # heap of (priority, seq, cost, hold, future)
+        self._seq = itertools.count()
+        self._timer = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: Priority, cost: float, max_wait: float, hold: bool = True):
+        cost = min(cost, self.bucket.capacity)
+        if not self._waiters and (not hold or self.in_flight < self.concurrency) and self.bucket.try_take(cost):
+            if hold:
+                self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._shed(priority)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), cost, hold, future)
+        heapq.heappush(self._waiters, entry)
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), max_wait)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                return  # Granted at the same moment the wait expired.
+            self._forget(entry)
+            wait = self.bucket.wait_time(cost)
+            if wait > 0:
+                raise QuotaExhaustedError(f"{self.name}: rate limit reached", retry_after=wait)
+            raise QueueFullError(f"{self.name}: all workers busy", retry_after=max_wait)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                if hold:
+                    self.release()
+            else:
+                self._forget(entry)
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _forget(self, entry):
+        entry[4].cancel()
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+
+    def _shed(self, priority: Priority):
+        """Makes room in a full queue by evicting a lower-priority waiter, or rejects the newcomer."""
+        victim = max(self._waiters, key=lambda e: (e[0], e[1]))
+        if victim[0] <= priority:
+            raise QueueFullError(f"{self.name}: queue full", retry_after=self.bucket.wait_time() or 1.0)
+        self._waiters.remove(victim)
+        heapq.heapify(self._waiters)
+        victim[4].set_exception(QueueFullError(f"{self.name}: evicted by higher-priority work"))
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._waiters:
+            _, _, cost, hold, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if hold and self.in_flight >= self.concurrency:
+                return
+            if not self.bucket.try_take(cost):
+                delay = self.bucket.wait_time(cost)
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            if hold:
+                self.in_flight += 1
+            future.set_result(None)
+
+
+class SchedulerRateLimiter(BaseRateLimiter):
+    """
+    LangChain rate limiter that charges every request a chat model makes to a
+    provider's token bucket, at the priority of the pipeline it runs in. One
+    agent turn or RAG answer therefore pays for each Gemini call it makes.
+    """
+
+    def __init__(self, limiter: ProviderLimiter, max_wait: float = None):
+        self.limiter = limiter
+        self.max_wait = max_wait
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        # Synchronous callers (the Streamlit app) have no event loop to queue on,
+        # so they simply wait for the bucket to refill.
+        if not blocking:
+            return self.limiter.bucket.try_take()
+        while not self.limiter.bucket.try_take():
+            time.sleep(self.limiter.bucket.wait_time())
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return self.limiter.bucket.try_take()
+        priority = current_priority()
+        max_wait = self.max_wait or settings.SCHEDULER_MAX_WAIT[priority.name.lower()]
+        await self.limiter.acquire(priority, 1, max_wait, hold=False)
+        metered = _metered.get()
+        if metered is not None and self.limiter.name not in metered:
+            metered.append(self.limiter.name)
+        return True
+
+
+class ScheduledEmbeddings(Embeddings):
+    """
+    Wraps an embedding model so each async request is admitted through the
+    scheduler's limiter for its provider, holding a slot only while that request
+    runs. Synchronous calls (index builds, the Streamlit app) wait on the token
+    bucket alone, one token per batch of `batch_size` texts.
+    """
+
+    def __init__(self, embeddings, scheduler, provider: str, batch_size: int = 100):
+        self.embeddings = embeddings
+        self.scheduler = scheduler
+        self.provider = provider
+        self.batch_size = batch_size
+        self._rate_limiter = SchedulerRateLimiter(scheduler.limiters[provider])
+
+    def embed_documents(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            self._rate_limiter.acquire()
+            vectors.extend(self.embeddings.embed_documents(texts[start:start + self.batch_size]))
+        return vectors
+
+    def embed_query(self, text):
+        self._rate_limiter.acquire()
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts):
+        return await self.scheduler.run(
+            lambda: self.embeddings.aembed_documents(texts), self.provider, priority=current_priority()
+        )
+
+    async def aembed_query(self, text):
+        return await self.scheduler.run(
+            lambda: self.embeddings.aembed_query(text), self.provider, priority=current_priority()
+        )
+
+
+class LLMScheduler:
+    """
+    Central scheduler for outbound LLM, embedding, translation and search calls.
+    Every call is admitted through its provider's limiter and retried with
+    jittered exponential backoff on quota and transient errors.
+
+    Pipelines that make a variable number of requests (the RAG chain, the
+    agent) are not charged up front. Their chat model carries rate_limiter(),
+    their embeddings and tools are wrapped per call, and run() only sets the
+    priority those requests queue at.
+    """
+
+    def __init__(self, limits: dict):
+        self.limiters = {name: ProviderLimiter(name, **cfg) for name, cfg in limits.items()}
+
+    def rate_limiter(self, provider: str, max_wait: float = None) -> SchedulerRateLimiter:
+        """A LangChain rate limiter charging each model request to `provider`."""
+        return SchedulerRateLimiter(self.limiters[provider], max_wait=max_wait)
+
+    def embeddings(self, embeddings, provider: str = "embedding") -> ScheduledEmbeddings:
+        """Wraps an embedding model so each request it makes is admitted through `provider`."""
+        return ScheduledEmbeddings(embeddings, self, provider)
+
+    @staticmethod
+    def _providers(provider):
+        if not provider:
+            return []
+        return sorted([provider] if isinstance(provider, str) else set(provider))
+
+    @contextlib.asynccontextmanager
+    async def slot(self, provider=(), priority: Priority = Priority.ANSWER,
+                   cost: float = 1, max_wait: float = None):
+        """
+        Holds a slot on every named provider for the duration of the block.
+        Used for streamed calls, which cannot be retried once output has been sent.
+        """
+        providers = self._providers(provider)
+        if max_wait is None:
+            max_wait = settings.SCHEDULER_MAX_WAIT[priority.name.lower()]
+
+        acquired, metered = [], []
+        priority_token = _current_priority.set(priority)
+        metered_token = _metered.set(metered)
+        try:
+            for name in providers:
+                await self.limiters[name].acquire(priority, cost, max_wait)
+                acquired.append(name)
+            yield
+        except Exception as e:
+            if classify_error(e) == "quota":
+                for name in set(acquired + metered):
+                    self.limiters[name].bucket.drain()
+            raise
+        finally:
+            _metered.reset(metered_token)
+            _current_priority.reset(priority_token)
+            for name in acquired:
+                self.limiters[name].release()
+
+    async def run(self, call, provider=(), priority: Priority = Priority.ANSWER,
+                  cost: float = 1, max_wait: float = None, retries: int = None):
+        """
+        Runs `call` (a zero-argument function returning an awaitable) once a slot
+        is free on every provider named in `provider` (a name or list of names).
+        Requests charged per call inside `call` queue at `priority`.
+        """
+        providers = self._providers(provider)
+        if max_wait is None:
+            max_wait = settings.SCHEDULER_MAX_WAIT[priority.name.lower()]
+        if retries is None:
+            retries = settings.SCHEDULER_MAX_RETRIES
+
+        attempt = 0
+        while True:
+            acquired, metered = [], []
+            priority_token = _current_priority.set(priority)
+            metered_token = _metered.set(metered)
+            try:
+                for name in providers:
+                    await self.limiters[name].acquire(priority, cost, max_wait)
+                    acquired.append(name)
+                return await call()
+            except SchedulerRejected:
+                raise
+            except Exception as e:
+                kind = classify_error(e)
+                if kind is None:
+                    raise
+                if kind == "quota":
+                    for name in set(acquired + metered):
+                        self.limiters[name].bucket.drain()
+                delay = random.uniform(0, min(settings.SCHEDULER_BACKOFF_CAP,
+                                              settings.SCHEDULER_BACKOFF_BASE * 2 ** attempt))
+                label = "/".join(sorted(set(providers + metered))) or "call"
+                if attempt >= retries:
+                    error_cls = QuotaExhaustedError if kind == "quota" else QueueFullError
+                    raise error_cls(f"{label}: {e}", retry_after=delay or 1.0) from e
+                attempt += 1
+                print(f"--- {label} call failed ({kind}), retry {attempt}/{retries} in {delay:.1f}s ---")
+            finally:
+                _metered.reset(metered_token)
+                _current_priority.reset(priority_token)
+                for name in acquired:
+                    self.limiters[name].release()
+            await asyncio.sleep(delay)
+
+
+_scheduler = None
+
+
+def get_scheduler() -> LLMScheduler:
+    """Returns the process-wide scheduler, creating it on first use."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(settings.PROVIDER_LIMITS)
+    return _scheduler
@@ -1,19 +1,49 @@
 from langchain_community.tools import WikipediaQueryRun, TavilySearchResults
 from langchain_community.utilities import WikipediaAPIWrapper
+from langchain_core.tools import StructuredTool
+from config.settings import settings
+from core.scheduler import get_scheduler, current_priority
 
-def load_tools():
+def scheduled_tool(tool, provider):
+    """
+    Wraps a tool so every async call is admitted through the scheduler's limiter
+    for `provider`, at the priority of the pipeline calling it. Synchronous
+    calls go straight through.
+    """
+    scheduler = get_scheduler()
+
+    # A ReAct agent passes its action input as one string; tool-calling agents pass keyword arguments.
+    def call(*args, **kwargs):
+        return tool.invoke(args[0] if args else kwargs)
+
+    async def arun(*args, **kwargs):
+        tool_input = args[0] if args else kwargs
+        return await scheduler.run(lambda: tool.ainvoke(tool_input), provider, priority=current_priority(), retries=0)
+
+    return StructuredTool.from_function(
+        func=call,
+        coroutine=arun,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+    )
+
+def load_tools(max_results=None):
     """
     Loads the tools for the conversational agent.
     - Tavily Search: For real-time, up-to-date information from the web.
     - Wikipedia: For general knowledge questions.
+    The number of search results follows the active prompt profile unless given.
     """
+    max_results = max_results or settings.PROMPT_BUDGETS[settings.PROMPT_PROFILE]["search_results"]
+
     # Initialize Tavily Search tool
     # This requires a TAVILY_API_KEY in your .env file.
-    tavily_search = TavilySearchResults(max_results=10)
+    tavily_search = TavilySearchResults(max_results=max_results)
 
     # Initialize Wikipedia tool
    # wiki = WikipediaQueryRun(
       #  api_wrapper=WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=2000)
     #)
 
-    return [tavily_search]
+    return [scheduled_tool(tavily_search, "search")]
@@ -1,34 +1,43 @@
+import asyncio
 from langdetect import detect, DetectorFactory, LangDetectException
 from deep_translator import GoogleTranslator
+from core.scheduler import get_scheduler, Priority, SchedulerRejected
 
 # Enforce consistent results from langdetect for reliability
 DetectorFactory.seed = 0
 
-def translate_to_english(text: str):
+def _detect_language(text: str) -> str:
     """
-    Detects the language of the input text and translates it to English if necessary.
+    Detects the language of the text locally, defaulting to English.
     Includes improved checks to prevent misdetection of short English text.
     """
+    # If the text is very short, it's often misclassified.
+    # Assume it's English to prevent errors with words like "ok".
+    if len(text.strip()) <= 3:
+        return "en"
     try:
-        # If the text is very short, it's often misclassified.
-        # Assume it's English to prevent errors with words like "ok".
-        if len(text.strip()) <= 3:
-            return text, "en"
+        return detect(text)
+    except LangDetectException:
+        print("Language could not be detected. Defaulting to English.")
+        return "en"
+    except Exception as e:
+        print(f"Language detection error: {e}")
+        return "en"
 
-        detected_lang = detect(text)
-        
-        if detected_lang == "en":
-            return text, "en"
+def translate_to_english(text: str):
+    """
+    Detects the language of the input text and translates it to English if necessary.
+    """
+    detected_lang = _detect_language(text)
+    if detected_lang == "en":
+        return text, "en"
 
+    try:
         print(f"Language detected: {detected_lang}. Translating to English...")
         translated_text = GoogleTranslator(source=detected_lang, target="en").translate(text)
         return translated_text, detected_lang
-        
-    except LangDetectException:
-        print("Language could not be detected. Defaulting to English.")
-        return text, "en"
     except Exception as e:
-        print(f"Language detection/translation error: {e}")
+        print(f"Translation error: {e}")
         return text, "en"
 
 def translate_back(text: str, target_lang: str):
@@ -38,10 +47,53 @@ def translate_back(text: str, target_lang: str):
     try:
         if target_lang in ["en", "unknown"]:
             return text
-        
+
         print(f"Translating response back to {target_lang}...")
         return GoogleTranslator(source="en", target=target_lang).translate(text)
-        
+
+    except Exception as e:
+        print(f"Error translating back to {target_lang}: {e}")
+        return text
+
+async def _scheduled_translate(text: str, source: str, target: str, priority: Priority):
+    """
+    Runs one Google Translate request off the event loop under the scheduler's
+    translate limiter, which retries quota and transient errors with backoff.
+    """
+    translator = GoogleTranslator(source=source, target=target)
+    return await get_scheduler().run(
+        lambda: asyncio.to_thread(translator.translate, text), "translate", priority=priority
+    )
+
+async def atranslate_to_english(text: str, priority: Priority = Priority.ROUTING):
+    """
+    Async variant of translate_to_english for the API. Only an actual translation
+    is admitted through the scheduler; English input never leaves the process.
+    Overload is raised as SchedulerRejected, other failures fall back to the original text.
+    """
+    detected_lang = _detect_language(text)
+    if detected_lang == "en":
+        return text, "en"
+
+    try:
+        print(f"Language detected: {detected_lang}. Translating to English...")
+        return await _scheduled_translate(text, detected_lang, "en", priority), detected_lang
+    except SchedulerRejected:
+        raise
+    except Exception as e:
+        print(f"Translation error: {e}")
+        return text, "en"
+
+async def atranslate_back(text: str, target_lang: str, priority: Priority = Priority.ROUTING):
+    """Async variant of translate_back for the API, admitted through the scheduler."""
+    if target_lang in ["en", "unknown"]:
+        return text
+
+    try:
+        print(f"Translating response back to {target_lang}...")
+        return await _scheduled_translate(text, "en", target_lang, priority)
+    except SchedulerRejected:
+        raise
     except Exception as e:
         print(f"Error translating back to {target_lang}: {e}")
         return text
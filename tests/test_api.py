@@ -0,0 +1,107 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+import api
+from core.scheduler import LLMScheduler, QueueFullError, QuotaExhaustedError
+
+LONG_ANSWER = "Onions grow best in well-drained loamy soil with a pH between 6.0 and 7.5, planted in rows 15 cm apart and watered lightly every week. "
+
+
+class FakeChain:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+
+    async def ainvoke(self, inputs, **kwargs):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class FakeRagChain:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def astream(self, inputs):
+        for chunk in self.chunks:
+            yield {"answer": chunk}
+
+    async def ainvoke(self, inputs):
+        return {"answer": "".join(self.chunks)}
+
+
+class EmptyFaqIndex:
+    empty = True
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def english(text, priority=None):
+        return text, "en"
+
+    async def unchanged(text, lang, priority=None):
+        return text
+
+    monkeypatch.setattr(api, "get_scheduler", lambda: LLMScheduler({}))
+    monkeypatch.setattr(api, "answer_price_query", lambda query: None)
+    monkeypatch.setattr(api, "answer_faq_query", lambda query: None)
+    monkeypatch.setattr(api, "get_faq_index", lambda: EmptyFaqIndex())
+    monkeypatch.setattr(api, "atranslate_to_english", english)
+    monkeypatch.setattr(api, "atranslate_back", unchanged)
+    monkeypatch.setattr(api, "models", {
+        "classifier_chain": FakeChain("Agricultural"),
+        "suggestion_chain": FakeChain("Which onion variety suits black soil?"),
+        "agent": FakeChain({"output": "Search results say onions need 100 kg N per hectare."}),
+    })
+    monkeypatch.setattr(api, "chat_histories", {})
+    return TestClient(api.app)
+
+
+def _events(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_stream_sends_rag_tokens_then_done(client):
+    # The opening is held back until it is long enough to rule out a fallback reply.
+    api.models["rag_chain"] = FakeRagChain([LONG_ANSWER[:60], LONG_ANSWER[60:125], LONG_ANSWER[125:]])
+    events = _events(client.post("/chat/stream", json={"query": "How do I grow onions?", "session_id": "s1"}))
+
+    assert [event["type"] for event in events] == ["token", "token", "done"]
+    assert events[0]["text"] == LONG_ANSWER[:125]
+    assert "".join(event["text"] for event in events[:-1]) == LONG_ANSWER
+    assert events[-1]["response"] == LONG_ANSWER.strip()
+    assert events[-1]["suggestions"] == ["Which onion variety suits black soil?"]
+
+
+def test_stream_resets_when_a_streamed_answer_falls_back_to_the_agent(client):
+    api.models["rag_chain"] = FakeRagChain([LONG_ANSWER, "For fertilizer doses I don't know the answer."])
+    events = _events(client.post("/chat/stream", json={"query": "How much fertilizer for onions?", "session_id": "s1"}))
+
+    assert [event["type"] for event in events] == ["token", "token", "reset", "token", "done"]
+    assert events[-1]["response"] == "Search results say onions need 100 kg N per hectare."
+
+
+def test_stream_reports_overload_mid_answer_as_an_error_event(client):
+    api.models["rag_chain"] = FakeRagChain(["I don't know."])
+    api.models["agent"] = FakeChain(error=QueueFullError("search queue is full", retry_after=2))
+    events = _events(client.post("/chat/stream", json={"query": "Onion prices next month?", "session_id": "s1"}))
+
+    assert [event["type"] for event in events] == ["error"]
+    assert events[0]["status_code"] == 503 and events[0]["retry_after"] == 2
+    assert api.chat_histories["s1"] == []
+
+
+def test_overload_during_classification_is_an_http_status(client):
+    api.models["classifier_chain"] = FakeChain(error=QuotaExhaustedError("gemini quota exhausted", retry_after=3))
+    response = client.post("/chat/stream", json={"query": "How do I grow onions?", "session_id": "s1"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+
+
+def test_chat_and_stream_return_the_same_answer(client):
+    api.models["rag_chain"] = FakeRagChain([LONG_ANSWER])
+    streamed = _events(client.post("/chat/stream", json={"query": "How do I grow onions?", "session_id": "s1"}))[-1]
+    plain = client.post("/chat", json={"query": "How do I grow onions?", "session_id": "s2"}).json()
+
+    assert plain == {"response": streamed["response"], "session_id": "s2", "suggestions": streamed["suggestions"]}
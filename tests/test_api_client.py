@@ -0,0 +1,51 @@
+import json
+import httpx
+import pytest
+from core.api_client import AgriBotAPIError, AgriBotClient
+
+
+def _client(handler):
+    return AgriBotClient(base_url="http://agribot.test", transport=httpx.MockTransport(handler))
+
+
+def _ndjson(*events):
+    return "".join(json.dumps(event) + "\n" for event in events)
+
+
+def test_stream_chat_yields_events_in_order():
+    def handler(request):
+        assert request.url.path == "/chat/stream"
+        assert json.loads(request.content) == {"query": "How to grow onions?", "session_id": "s1"}
+        return httpx.Response(200, text=_ndjson(
+            {"type": "token", "text": "Onions need "},
+            {"type": "reset"},
+            {"type": "token", "text": "Sow onions in well-drained soil."},
+            {"type": "done", "response": "Sow onions in well-drained soil.", "session_id": "s1", "suggestions": []},
+        ))
+
+    events = list(_client(handler).stream_chat("How to grow onions?", "s1"))
+    assert [event["type"] for event in events] == ["token", "reset", "token", "done"]
+    assert events[-1]["response"] == "Sow onions in well-drained soil."
+
+
+def test_stream_chat_raises_on_error_event():
+    def handler(request):
+        return httpx.Response(200, text=_ndjson(
+            {"type": "token", "text": "Partial"},
+            {"type": "error", "status_code": 503, "detail": "gemini queue is full", "retry_after": 2},
+        ))
+
+    stream = _client(handler).stream_chat("How to grow onions?", "s1")
+    assert next(stream) == {"type": "token", "text": "Partial"}
+    with pytest.raises(AgriBotAPIError) as excinfo:
+        next(stream)
+    assert (excinfo.value.status_code, excinfo.value.detail) == (503, "gemini queue is full")
+
+
+def test_stream_chat_raises_on_rejected_request():
+    def handler(request):
+        return httpx.Response(429, json={"detail": "gemini quota exhausted"}, headers={"Retry-After": "4"})
+
+    with pytest.raises(AgriBotAPIError) as excinfo:
+        list(_client(handler).stream_chat("How to grow onions?", "s1"))
+    assert (excinfo.value.status_code, excinfo.value.detail) == (429, "gemini quota exhausted")
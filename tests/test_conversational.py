@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from langchain_core.agents import AgentAction, AgentStep
+from langchain_core.messages import AIMessage, HumanMessage
+from agent.conversational import DeadlineAgent, TIMEOUT_MESSAGE
+from core.prompt_budget import PromptBudget, count_tokens
+from core.scheduler import QueueFullError
+
+STEP = AgentStep(
+    action=AgentAction(tool="tavily_search_results_json", tool_input="onion sowing season", log=""),
+    observation="Onion is sown in October-November for the rabi crop.",
+)
+
+
+class FakeExecutor:
+    """Yields the given chunks, then either hangs, raises or finishes."""
+
+    def __init__(self, chunks, then=None):
+        self.chunks = chunks
+        self.then = then
+
+    async def astream(self, inputs):
+        for chunk in self.chunks:
+            yield chunk
+        if self.then == "hang":
+            await asyncio.sleep(10)
+        elif self.then is not None:
+            raise self.then
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        return AIMessage(content="Sow onion in October.")
+
+
+def _ask(executor, llm, budget=0.3):
+    agent = DeadlineAgent(executor, llm, budget=budget, reserve=0.1)
+    return asyncio.run(agent.ainvoke({"input": "When to sow onion?", "chat_history": []}))
+
+
+def test_finished_turn_returns_the_agent_output():
+    llm = FakeLLM()
+    result = _ask(FakeExecutor([{"steps": [STEP]}, {"output": "October to November."}]), llm)
+    assert result == {"output": "October to November.", "intermediate_steps": [STEP], "partial": False, "prompt_tokens": None}
+    assert llm.prompts == []
+
+
+def test_deadline_writes_a_partial_answer_from_gathered_steps():
+    llm = FakeLLM()
+    result = _ask(FakeExecutor([{"steps": [STEP]}], then="hang"), llm)
+    assert result["partial"] is True
+    assert result["output"] == "Sow onion in October."
+    assert "October-November" in llm.prompts[0]
+
+
+def test_deadline_without_findings_returns_timeout_message():
+    llm = FakeLLM()
+    result = _ask(FakeExecutor([], then="hang"), llm)
+    assert result["output"] == TIMEOUT_MESSAGE
+    assert llm.prompts == []
+
+
+def test_rejection_after_tool_steps_writes_a_partial_answer():
+    result = _ask(FakeExecutor([{"steps": [STEP]}], then=QueueFullError("gemini: queue full")), FakeLLM())
+    assert result["partial"] is True
+    assert result["intermediate_steps"] == [STEP]
+
+
+def test_rejection_before_any_tool_step_is_raised():
+    with pytest.raises(QueueFullError):
+        _ask(FakeExecutor([], then=QueueFullError("gemini: queue full")), FakeLLM())
+
+
+def test_result_reports_prompt_tokens_for_history_and_observations():
+    agent = DeadlineAgent(
+        FakeExecutor([{"steps": [STEP, STEP]}, {"output": "October to November."}]),
+        FakeLLM(), budget=1, reserve=0.1, prompt_budget=PromptBudget("You are Agri-Advisor."),
+    )
+    history = [HumanMessage(content="Hello"), AIMessage(content="Hello! How can I help?")]
+    result = asyncio.run(agent.ainvoke({"input": "When to sow onion?", "chat_history": history}))
+
+    report = result["prompt_tokens"]
+    assert (report["history_items"], report["observations_items"]) == (2, 2)
+    assert report["observations"] == 2 * count_tokens(STEP.observation)
+    assert report["total"] == report["system"] + report["history"] + report["input"] + report["observations"]
@@ -0,0 +1,70 @@
+import asyncio
+from langchain_core.documents import Document
+from agent import faq
+
+
+class FakeChain:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        return self.result
+
+
+class FakeEmbeddings:
+    async def aembed_query(self, text):
+        return [1.0, 0.0]
+
+
+def test_unanswerable_question_is_not_regenerated_until_documents_change(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "document").mkdir()
+    rag_chain = FakeChain({"answer": "I don't know, the documents do not cover this.", "context": []})
+    suggestion_chain = FakeChain("")
+    questions = ["What is the weather in Pune?"]
+
+    index = asyncio.run(faq.build_faq_index(rag_chain, suggestion_chain, FakeEmbeddings(), questions=questions))
+    assert index.empty
+    assert faq.load_faq_index().missing(questions) == []
+
+    asyncio.run(faq.build_faq_index(rag_chain, suggestion_chain, FakeEmbeddings(), questions=questions))
+    assert rag_chain.calls == 1
+
+    (tmp_path / "document" / "weather.pdf").write_bytes(b"new document")
+    assert faq.load_faq_index().missing(questions) == questions
+    asyncio.run(faq.build_faq_index(rag_chain, suggestion_chain, FakeEmbeddings(), questions=questions))
+    assert rag_chain.calls == 2
+
+
+def test_answers_without_resolvable_sources_are_skipped(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "document").mkdir()
+    (tmp_path / "document" / "pm_kisan.pdf").write_bytes(b"PM-KISAN guidelines")
+    questions = ["What is PM-KISAN?", "What is Soil Health Card?", "What is Kisan Credit Card?"]
+    answers = {
+        "What is PM-KISAN?": [Document(page_content="...", metadata={"source": "document/pm_kisan.pdf"})],
+        "What is Soil Health Card?": [Document(page_content="...", metadata={"source": "document/removed.pdf"})],
+        "What is Kisan Credit Card?": [],
+    }
+
+    class CitingChain(FakeChain):
+        async def ainvoke(self, inputs):
+            self.calls += 1
+            return {"answer": "A government scheme for farmers.", "context": answers[inputs["input"]]}
+
+    rag_chain = CitingChain(None)
+    index = asyncio.run(faq.build_faq_index(rag_chain, FakeChain(""), FakeEmbeddings(), questions=questions))
+
+    assert [entry["question"] for entry in index.entries] == ["What is PM-KISAN?"]
+    assert index.missing(questions) == []
+    skipped = faq._read_index()["skipped"]
+    assert {item["question"]: item["reason"] for item in skipped} == {
+        "What is Soil Health Card?": "unresolved_sources",
+        "What is Kisan Credit Card?": "unresolved_sources",
+    }
+
+
+def test_entries_citing_no_documents_are_never_fresh():
+    assert not faq.is_entry_fresh({"sources": {}})
@@ -0,0 +1,95 @@
+import datetime
+import pandas as pd
+import pytest
+from core.price_index import PriceIndex
+
+TODAY = datetime.date(2024, 11, 20)
+
+
+@pytest.fixture
+def index():
+    prices = pd.DataFrame({
+        "commodity": ["Onion", "Onion", "Wheat", "Potato"],
+        "market": ["Lasalgaon", "Lasalgaon", "Indore", "Agra"],
+        "state": ["Maharashtra", "Maharashtra", "Madhya Pradesh", "Uttar Pradesh"],
+        "district": ["Nashik", "Nashik", "Indore", "Agra"],
+        "variety": ["Red", "Red", "Lokwan", "Local"],
+        "date": pd.to_datetime(["2024-11-15", "2024-11-19", "2024-11-18", "2024-11-18"]),
+        "min_price": [2000.0, 2200.0, 2400.0, 900.0],
+        "max_price": [3000.0, 3200.0, 2800.0, 1300.0],
+        "modal_price": [2500.0, 2700.0, 2600.0, 1100.0],
+    })
+    return PriceIndex(prices)
+
+
+def test_market_price_question_is_answered_from_the_index(index):
+    spec = index.parse("What was the onion price in Lasalgaon last week?", today=TODAY)
+    assert spec["commodity"] == "onion"
+    assert spec["market"] == "lasalgaon"
+    assert spec["start"] == datetime.date(2024, 11, 14)
+
+    answer = index.answer("What was the onion price in Lasalgaon last week?", today=TODAY)
+    assert "Lasalgaon" in answer
+    assert "₹2,700" in answer
+
+
+@pytest.mark.parametrize("question", [
+    "onion rate in Lasalgaon",
+    "What are today's rates in Lasalgaon for pyaz?",
+    "gehun ka bhav Indore",
+])
+def test_price_questions_with_rate_or_local_words(index, question):
+    assert index.parse(question, today=TODAY) is not None
+
+
+@pytest.mark.parametrize("question", [
+    "What is the seed rate of wheat per acre?",
+    "What is the interest rate on loans for wheat farmers?",
+    "cost of cultivation of potato",
+    "What is the cost of potato seed?",
+    "What is the application rate of urea for wheat?",
+    "What is the minimum support price of wheat?",
+    "How do I grow onion in black soil?",
+    "What is the price of onion seeds?",
+    "what fertilizer price for wheat",
+    "How to control price of tomato pests",
+    "Which wheat variety fetches a better price?",
+    "Will onion prices rise next month in Lasalgaon?",
+    "onion price forecast for Lasalgaon",
+])
+def test_agronomy_questions_are_not_price_lookups(index, question):
+    assert index.parse(question, today=TODAY) is None
+    assert index.answer(question, today=TODAY) is None
+
+
+@pytest.mark.parametrize("question", [
+    "onion price in Pune",
+    "onion price in Pune last week",
+    "What is the onion price at Nagpur mandi?",
+])
+def test_unknown_place_falls_through_instead_of_listing_other_markets(index, question):
+    assert index.parse(question, today=TODAY) is None
+    assert index.answer(question, today=TODAY) is None
+
+
+def test_place_fillers_are_not_mistaken_for_markets(index):
+    assert index.parse("onion price in India today", today=TODAY) is not None
+    assert index.parse("onion price in Maharashtra", today=TODAY)["state"] == "maharashtra"
+
+
+def test_year_without_prices_says_so(index):
+    spec = index.parse("onion price in Lasalgaon in 2019", today=TODAY)
+    assert (spec["start"], spec["end"], spec["period"]) == (datetime.date(2019, 1, 1), datetime.date(2019, 12, 31), "2019")
+
+    answer = index.answer("onion price in Lasalgaon in 2019", today=TODAY)
+    assert answer.startswith("No prices were reported for 2019.")
+
+
+def test_month_is_read_as_a_period(index):
+    spec = index.parse("onion price in Lasalgaon in November", today=TODAY)
+    assert (spec["start"], spec["end"]) == (datetime.date(2024, 11, 1), datetime.date(2024, 11, 30))
+    assert "₹2,700" in index.answer("onion price in Lasalgaon in November", today=TODAY)
+
+
+def test_unreadable_date_falls_through(index):
+    assert index.parse("onion price in Lasalgaon on 31/02/2024", today=TODAY) is None
@@ -0,0 +1,56 @@
+import pytest
+from langchain_core.agents import AgentAction
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+from config.settings import settings
+from core.prompt_budget import PromptBudget, TRIMMED_MARKER, count_tokens
+
+# 40 characters, i.e. 10 tokens at four characters per token.
+TEN_TOKENS = "x" * 40
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setitem(settings.PROMPT_BUDGETS, "test", {"total": 100, "history": 30, "observation": 20, "search_results": 3})
+    return PromptBudget(TEN_TOKENS, profile="test")
+
+
+def test_fit_history_keeps_the_most_recent_messages(budget):
+    messages = [HumanMessage(content=TEN_TOKENS) if i % 2 == 0 else AIMessage(content=TEN_TOKENS) for i in range(5)]
+    assert budget.fit_history(messages) == messages[-3:]
+    # A long input leaves less room than the history allowance.
+    assert budget.fit_history(messages, reserved=65) == messages[-2:]
+
+
+def test_fit_history_drops_everything_before_an_oversized_message(budget):
+    messages = [HumanMessage(content=TEN_TOKENS), AIMessage(content="y" * 200)]
+    assert budget.fit_history(messages) == []
+
+
+def test_fit_documents_keeps_rank_order_until_the_budget_is_spent(budget):
+    docs = [Document(page_content=c * 160, metadata={"rank": i}) for i, c in enumerate("abc")]
+    assert budget.fit_documents(docs) == docs[:2]
+
+
+def test_fit_documents_truncates_an_oversized_top_document(budget):
+    docs = [Document(page_content="a" * 160, metadata={"source": "document/a.pdf"})]
+    [kept] = budget.fit_documents(docs, reserved=60)
+    assert kept.page_content.endswith(TRIMMED_MARKER)
+    assert count_tokens(kept.page_content) == 30
+    assert kept.metadata == {"source": "document/a.pdf"}
+
+
+def test_fit_observations_caps_each_and_omits_the_oldest(budget):
+    action = AgentAction(tool="search", tool_input="onion", log="")
+    steps = [(action, "o" * 200) for _ in range(3)] + [(action, {"results": ["p" * 200]})]
+    fitted = budget.fit_observations(steps)
+
+    assert [a for a, _ in fitted] == [action] * 4
+    assert fitted[0][1] == "[Observation omitted to fit the prompt budget.]"
+    assert all(count_tokens(observation) == 20 for _, observation in fitted[1:])
+    assert fitted[-1][1].startswith('{"results"')
+
+
+def test_report_counts_tokens_and_items(budget):
+    report = budget.report(history=[HumanMessage(content=TEN_TOKENS)] * 2, input="When to sow onion?")
+    assert report == {"system": 10, "history": 20, "input": 5, "total": 35, "history_items": 2}
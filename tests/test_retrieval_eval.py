@@ -0,0 +1,43 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from agent.retrieval_eval import evaluate_config
+
+TOPICS = ("kisan", "bima", "soil")
+
+
+class TopicEmbeddings(Embeddings):
+    """Embeds a chunk as a one-hot vector of the topic it mentions; queries are looked up by text."""
+
+    def __init__(self, queries):
+        self.queries = queries
+
+    def embed_documents(self, texts):
+        return [[1.0 if topic in text.lower() else 0.0 for topic in TOPICS] for text in texts]
+
+    def embed_query(self, text):
+        return self.queries[text]
+
+
+PAGES = [
+    Document(page_content="PM Kisan pays Rs 6,000 a year to farmer families.", metadata={"source": "document/kisan.pdf"}),
+    Document(page_content="Fasal Bima claims must be reported within 72 hours.", metadata={"source": "document/bima.pdf"}),
+    Document(page_content="A Soil Health Card lists nutrient levels of the field.", metadata={"source": "document/soil.pdf"}),
+]
+
+QUESTIONS = [
+    # Only one of the two alternative phrasings appears, which must still count as a hit.
+    {"question": "kisan amount", "evidence": ["6,000", "6000"]},
+    # The query sits closest to the soil chunk, so the relevant bima chunk is ranked second.
+    {"question": "bima deadline", "evidence": ["72 hours"], "source": "bima"},
+]
+
+
+def test_hit_and_mrr_at_k():
+    embedder = TopicEmbeddings({"kisan amount": [1.0, 0.0, 0.0], "bima deadline": [0.0, 0.6, 0.8]})
+    rows = evaluate_config(PAGES, QUESTIONS, embedder, chunk_size=1000, chunk_overlap=0,
+                           index_type="flat", k_values=[1, 3], repeats=1)
+    by_k = {row["k"]: row for row in rows}
+
+    assert by_k[1]["chunks"] == 3
+    assert (by_k[1]["hit"], by_k[1]["mrr"]) == (0.5, 0.5)
+    assert (by_k[3]["hit"], by_k[3]["mrr"]) == (1.0, 0.75)
@@ -0,0 +1,179 @@
+import asyncio
+import pytest
+from core.scheduler import (
+    LLMScheduler,
+    Priority,
+    ProviderLimiter,
+    QueueFullError,
+    QuotaExhaustedError,
+    current_priority,
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_waiters_are_served_in_priority_order():
+    async def scenario():
+        limiter = ProviderLimiter("gemini", rpm=6000, burst=10, concurrency=1, max_queue=10)
+        await limiter.acquire(Priority.ANSWER, 1, max_wait=1)
+        served = []
+
+        async def waiter(priority):
+            await limiter.acquire(priority, 1, max_wait=1)
+            served.append(priority)
+            limiter.release()
+
+        tasks = [asyncio.create_task(waiter(p)) for p in (Priority.SUGGESTION, Priority.ROUTING, Priority.ANSWER)]
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*tasks)
+        return served
+
+    assert run(scenario()) == [Priority.ANSWER, Priority.ROUTING, Priority.SUGGESTION]
+
+
+def test_full_queue_evicts_lower_priority_waiter():
+    async def scenario():
+        limiter = ProviderLimiter("gemini", rpm=6000, burst=10, concurrency=1, max_queue=1)
+        await limiter.acquire(Priority.ANSWER, 1, max_wait=1)
+        suggestion = asyncio.create_task(limiter.acquire(Priority.SUGGESTION, 1, max_wait=1))
+        await asyncio.sleep(0)
+        answer = asyncio.create_task(limiter.acquire(Priority.ANSWER, 1, max_wait=1))
+        await asyncio.sleep(0)
+
+        with pytest.raises(QueueFullError):
+            await suggestion
+        limiter.release()
+        await answer
+        assert limiter.in_flight == 1 and limiter.queue_depth == 0
+
+    run(scenario())
+
+
+def test_full_queue_rejects_newcomer_of_equal_or_lower_priority():
+    async def scenario():
+        limiter = ProviderLimiter("gemini", rpm=6000, burst=10, concurrency=1, max_queue=1)
+        await limiter.acquire(Priority.ANSWER, 1, max_wait=1)
+        queued = asyncio.create_task(limiter.acquire(Priority.ROUTING, 1, max_wait=1))
+        await asyncio.sleep(0)
+
+        with pytest.raises(QueueFullError):
+            await limiter.acquire(Priority.SUGGESTION, 1, max_wait=1)
+        limiter.release()
+        await queued
+
+    run(scenario())
+
+
+def test_timeout_without_tokens_is_quota_exhausted():
+    async def scenario():
+        limiter = ProviderLimiter("gemini", rpm=1, burst=1, concurrency=4, max_queue=4)
+        await limiter.acquire(Priority.ANSWER, 1, max_wait=1)
+        with pytest.raises(QuotaExhaustedError) as excinfo:
+            await limiter.acquire(Priority.ANSWER, 1, max_wait=0.05)
+        assert excinfo.value.status_code == 429
+        assert excinfo.value.retry_after > 1
+        assert limiter.queue_depth == 0
+
+    run(scenario())
+
+
+def test_timeout_with_workers_busy_is_queue_full():
+    async def scenario():
+        limiter = ProviderLimiter("search", rpm=6000, burst=10, concurrency=1, max_queue=4)
+        await limiter.acquire(Priority.ANSWER, 1, max_wait=1)
+        with pytest.raises(QueueFullError) as excinfo:
+            await limiter.acquire(Priority.ANSWER, 1, max_wait=0.05)
+        assert excinfo.value.status_code == 503
+        assert limiter.queue_depth == 0
+
+    run(scenario())
+
+
+def test_cancelled_waiter_leaves_queue_and_slots_intact():
+    async def scenario():
+        limiter = ProviderLimiter("search", rpm=6000, burst=10, concurrency=1, max_queue=4)
+        await limiter.acquire(Priority.ANSWER, 1, max_wait=1)
+        waiter = asyncio.create_task(limiter.acquire(Priority.ANSWER, 1, max_wait=1))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.queue_depth == 0
+
+        limiter.release()
+        assert limiter.in_flight == 0
+        await limiter.acquire(Priority.ANSWER, 1, max_wait=0.05)
+        assert limiter.in_flight == 1
+
+    run(scenario())
+
+
+def test_rate_only_waiters_hold_no_concurrency_slot():
+    async def scenario():
+        limiter = ProviderLimiter("gemini", rpm=6000, burst=10, concurrency=1, max_queue=4)
+        await limiter.acquire(Priority.ANSWER, 1, max_wait=1)
+        await limiter.acquire(Priority.ANSWER, 1, max_wait=0.05, hold=False)
+        assert limiter.in_flight == 1
+
+    run(scenario())
+
+
+def test_rate_limiter_charges_each_request_at_pipeline_priority():
+    async def scenario():
+        scheduler = LLMScheduler({"gemini": {"rpm": 60, "burst": 3, "concurrency": 1, "max_queue": 4}})
+        rate_limiter = scheduler.rate_limiter("gemini", max_wait=0.05)
+        seen = []
+
+        async def pipeline():
+            # One pipeline making three model requests pays for all three.
+            for _ in range(3):
+                await rate_limiter.aacquire()
+                seen.append(current_priority())
+            await rate_limiter.aacquire()
+
+        with pytest.raises(QuotaExhaustedError):
+            await scheduler.run(pipeline, priority=Priority.ROUTING, retries=0)
+        assert seen == [Priority.ROUTING] * 3
+        assert current_priority() == Priority.ANSWER
+
+    run(scenario())
+
+
+def test_upstream_quota_error_drains_metered_provider():
+    async def scenario():
+        scheduler = LLMScheduler({"gemini": {"rpm": 60, "burst": 5, "concurrency": 1, "max_queue": 4}})
+        rate_limiter = scheduler.rate_limiter("gemini")
+
+        async def pipeline():
+            await rate_limiter.aacquire()
+            raise RuntimeError("429 Resource exhausted")
+
+        with pytest.raises(QuotaExhaustedError):
+            await scheduler.run(pipeline, retries=0)
+        assert scheduler.limiters["gemini"].bucket.tokens < 1
+
+    run(scenario())
+
+
+def test_embeddings_hold_a_slot_only_while_each_request_runs():
+    class FakeEmbeddings:
+        def __init__(self):
+            self.in_flight_seen = []
+
+        async def aembed_query(self, text):
+            self.in_flight_seen.append(scheduler.limiters["embedding"].in_flight)
+            return [1.0]
+
+    scheduler = LLMScheduler({"embedding": {"rpm": 6000, "burst": 10, "concurrency": 1, "max_queue": 4}})
+    fake = FakeEmbeddings()
+    embeddings = scheduler.embeddings(fake)
+
+    async def scenario():
+        await asyncio.gather(*(embeddings.aembed_query(q) for q in ("a", "b", "c")))
+
+    run(scenario())
+    assert fake.in_flight_seen == [1, 1, 1]
+    assert scheduler.limiters["embedding"].in_flight == 0
@@ -0,0 +1,39 @@
+import asyncio
+from config.settings import settings
+from core import translation
+from core.scheduler import LLMScheduler
+
+
+def _scheduler(monkeypatch):
+    scheduler = LLMScheduler({"translate": {"rpm": 6000, "burst": 10, "concurrency": 2, "max_queue": 4}})
+    monkeypatch.setattr(translation, "get_scheduler", lambda: scheduler)
+    return scheduler
+
+
+def test_english_is_not_charged_to_the_translate_limiter(monkeypatch):
+    scheduler = _scheduler(monkeypatch)
+    text, lang = asyncio.run(translation.atranslate_to_english("What is the price of onion in Lasalgaon?"))
+    assert (text, lang) == ("What is the price of onion in Lasalgaon?", "en")
+    assert asyncio.run(translation.atranslate_back("Onion sells for Rs 2,700.", "en")) == "Onion sells for Rs 2,700."
+    assert scheduler.limiters["translate"].bucket.tokens >= 10 - 1e-6
+
+
+def test_transient_translation_errors_are_retried(monkeypatch):
+    _scheduler(monkeypatch)
+    monkeypatch.setattr(settings, "SCHEDULER_BACKOFF_BASE", 0.01)
+    calls = []
+
+    class FlakyTranslator:
+        def __init__(self, source, target):
+            pass
+
+        def translate(self, text):
+            calls.append(text)
+            if len(calls) == 1:
+                raise ConnectionError("503 Service Unavailable")
+            return "How to grow onions?"
+
+    monkeypatch.setattr(translation, "GoogleTranslator", FlakyTranslator)
+    text, lang = asyncio.run(translation.atranslate_to_english("प्याज कैसे उगाएं?"))
+    assert (text, lang) == ("How to grow onions?", "hi")
+    assert len(calls) == 2